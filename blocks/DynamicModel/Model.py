@@ -1,8 +1,17 @@
 
 # Import REGION
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from PyQt4 import uic
+import sys
+
+if "PyQt4.QtGui" in sys.modules:
+    # The graphic interface is running, the block can be configured with its window
+    from PyQt4.QtCore import *
+    from PyQt4.QtGui import *
+
+    import lib.FormCache
+else:
+    # Loaded without the graphic interface (see generate.py): PyQt4 is not imported,
+    # the block can be generated but not configured
+    QWidget = None
 
 from lib.Block import *
 
@@ -66,19 +75,27 @@ class DynamicBlockModel(Block):
     def generate(self):
         return ""
 
-#
-class WindowModel(QWidget):
-    # QtSignal that will be emitted with a list of parameters to generate a block using the dynamic model
-    accept = pyqtSignal(list)
-
-    def __init__(self,parent = None):
-        super().__init__()
-        # Reference to the path where the .ui that should be loaded is created.
-        PATH = "blocks\\DynamicModel\\Model.ui"
-        self.ui = uic.loadUi(PATH,self)
-
-    # When the parameters are caught, it should be passed as list in args
-    def accepted(self,args):
-        self.accept.emit(args)
-        self.close()
+    # Optional. Bit-parallel simulation of the block (see lib/Simulator.py)
+    # inputs is the list of packed values of each input port (one row per bit).
+    # It must return the list of packed values of each output port.
+    # Without this method the block can't be simulated.
+    #
+    # def evaluate(self,inputs):
+    #     return []
 
+#
+if QWidget != None:
+    class WindowModel(QWidget):
+        # QtSignal that will be emitted with a list of parameters to generate a block using the dynamic model
+        accept = pyqtSignal(list)
+
+        def __init__(self,parent = None):
+            super().__init__()
+            # Reference to the path where the .ui that should be loaded is created.
+            PATH = "blocks\\DynamicModel\\Model.ui"
+            self.ui = lib.FormCache.loadUi(PATH,self)
+
+        # When the parameters are caught, it should be passed as list in args
+        def accepted(self,args):
+            self.accept.emit(args)
+            self.close()
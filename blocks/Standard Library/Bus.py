@@ -9,9 +9,18 @@ __isBlock__ = True
 __className__ = "Bus"
 __win__ = "BusWindow"
 
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from PyQt4 import uic
+import sys
+
+if "PyQt4.QtGui" in sys.modules:
+    # The graphic interface is running, the block can be configured with its window
+    from PyQt4.QtCore import *
+    from PyQt4.QtGui import *
+
+    import lib.FormCache
+else:
+    # Loaded without the graphic interface (see generate.py): PyQt4 is not imported,
+    # the block can be generated but not configured
+    QWidget = None
 
 from lib.Block import *
 
@@ -65,19 +74,32 @@ class Bus(Block):
             filetext += ";"
         return filetext
 
+    def evaluate(self,inputs):
+        """ Bit-parallel simulation of the bus (see lib/Simulator.py)
+            Row k of each array is the bit k of the port.
 
-class BusWindow(QWidget):
-    accept = pyqtSignal(list)
+        :array[] inputs:    Packed value of each input port (one row per bit)
+        """
+        if self.mode == "Splitter":
+            return [inputs[0][self.numbits-1-i:self.numbits-i] for i in range(self.numbits)]
+        else:
+            out = inputs[0].repeat(self.numbits,0)
+            for i in range(self.numbits):
+                out[self.numbits-1-i] = inputs[i][0]
+            return [out]
 
-    def __init__(self,parent = None):
-        super().__init__()
-        self.ui = uic.loadUi("blocks\\Standard Library\\Bus.ui",self)
-        self.ui.acceptButton.clicked.connect(self.accepted)
 
-    def accepted(self):
-        size = self.ui.size.value()
-        mode = "Splitter" if self.ui.symb0.isChecked() else "Joiner"
-        self.accept.emit([size,mode])
-        self.close()
+if QWidget != None:
+    class BusWindow(QWidget):
+        accept = pyqtSignal(list)
 
+        def __init__(self,parent = None):
+            super().__init__()
+            self.ui = lib.FormCache.loadUi("blocks\\Standard Library\\Bus.ui",self)
+            self.ui.acceptButton.clicked.connect(self.accepted)
 
+        def accepted(self):
+            size = self.ui.size.value()
+            mode = "Splitter" if self.ui.symb0.isChecked() else "Joiner"
+            self.accept.emit([size,mode])
+            self.close()
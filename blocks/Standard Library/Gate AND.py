@@ -9,9 +9,18 @@ __isBlock__ = True
 __className__ = "ANDGate"
 __win__ = "ANDGateWindow"
 
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from PyQt4 import uic
+import sys
+
+if "PyQt4.QtGui" in sys.modules:
+    # The graphic interface is running, the block can be configured with its window
+    from PyQt4.QtCore import *
+    from PyQt4.QtGui import *
+
+    import lib.FormCache
+else:
+    # Loaded without the graphic interface (see generate.py): PyQt4 is not imported,
+    # the block can be generated but not configured
+    QWidget = None
 
 from lib.Block import *
 
@@ -55,19 +64,28 @@ class ANDGate(Block):
         filetext += ";\n"
         return filetext
 
-class ANDGateWindow(QWidget):
-    accept = pyqtSignal(list)
+    def evaluate(self,inputs):
+        """ Bit-parallel simulation of the gate (see lib/Simulator.py)
 
-    def __init__(self,parent = None):
-        super().__init__()
-        self.ui = uic.loadUi("blocks\\Standard Library\\Gate.ui",self)
-        self.ui.acceptButton.clicked.connect(self.accepted)
-        self.ui.setWindowTitle("AND GATE")
-    def accepted(self):
-        numInput = self.ui.numInput.value()
-        sizeInput = self.ui.sizeInput.value()
+        :array[] inputs:    Packed value of each input port (one row per bit)
+        """
+        out = inputs[0]
+        for i in inputs[1:]:
+            out = out & i
+        return [out]
 
-        self.accept.emit([numInput,sizeInput])
-        self.close()
+if QWidget != None:
+    class ANDGateWindow(QWidget):
+        accept = pyqtSignal(list)
 
+        def __init__(self,parent = None):
+            super().__init__()
+            self.ui = lib.FormCache.loadUi("blocks\\Standard Library\\Gate.ui",self)
+            self.ui.acceptButton.clicked.connect(self.accepted)
+            self.ui.setWindowTitle("AND GATE")
+        def accepted(self):
+            numInput = self.ui.numInput.value()
+            sizeInput = self.ui.sizeInput.value()
 
+            self.accept.emit([numInput,sizeInput])
+            self.close()
@@ -9,9 +9,18 @@ __isBlock__ = True
 __className__ = "NOTGate"
 __win__ = "NOTGateWindow"
 
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from PyQt4 import uic
+import sys
+
+if "PyQt4.QtGui" in sys.modules:
+    # The graphic interface is running, the block can be configured with its window
+    from PyQt4.QtCore import *
+    from PyQt4.QtGui import *
+
+    import lib.FormCache
+else:
+    # Loaded without the graphic interface (see generate.py): PyQt4 is not imported,
+    # the block can be generated but not configured
+    QWidget = None
 
 from lib.Block import *
 
@@ -51,19 +60,25 @@ class NOTGate(Block):
         filetext += ";\n"
         return filetext
 
-class NOTGateWindow(QWidget):
-    accept = pyqtSignal(list)
+    def evaluate(self,inputs):
+        """ Bit-parallel simulation of the gate (see lib/Simulator.py)
 
-    def __init__(self,parent = None):
-        super().__init__()
-        self.ui = uic.loadUi("blocks\\Standard Library\\GATE NOT.ui",self)
-        self.ui.acceptButton.clicked.connect(self.accepted)
-        self.ui.setWindowTitle("NOT GATE")
+        :array[] inputs:    Packed value of each input port (one row per bit)
+        """
+        return [~inputs[0]]
 
-    def accepted(self):
-        sizeInput = self.ui.sizeInput.value()
+if QWidget != None:
+    class NOTGateWindow(QWidget):
+        accept = pyqtSignal(list)
 
-        self.accept.emit([sizeInput])
-        self.close()
+        def __init__(self,parent = None):
+            super().__init__()
+            self.ui = lib.FormCache.loadUi("blocks\\Standard Library\\GATE NOT.ui",self)
+            self.ui.acceptButton.clicked.connect(self.accepted)
+            self.ui.setWindowTitle("NOT GATE")
 
+        def accepted(self):
+            sizeInput = self.ui.sizeInput.value()
 
+            self.accept.emit([sizeInput])
+            self.close()
@@ -9,9 +9,18 @@ __isBlock__ = True
 __className__ = "Multiplexer"
 __win__ = "MuxWindow"
 
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from PyQt4 import uic
+import sys
+
+if "PyQt4.QtGui" in sys.modules:
+    # The graphic interface is running, the block can be configured with its window
+    from PyQt4.QtCore import *
+    from PyQt4.QtGui import *
+
+    import lib.FormCache
+else:
+    # Loaded without the graphic interface (see generate.py): PyQt4 is not imported,
+    # the block can be generated but not configured
+    QWidget = None
 
 from lib.Block import *
 
@@ -53,7 +62,7 @@ class Multiplexer(Block):
             self.setInputName("EN",self.numMuxIn + 1)
 
         self.setOutputName("out",0)
-        self.variables = [("CHOSEN",sizeInput)]
+        self.addVariable("CHOSEN",sizeInput)
 
     def generate(self):
         filetext = ""
@@ -73,26 +82,50 @@ class Multiplexer(Block):
             filetext += "%s when others;\n"%(("'"+self.HiZ+"'") if (len(self.HiZ) == 1) else ('"'+self.HiZ+'"'))
         return filetext
 
+    def evaluate(self,inputs):
+        """ Bit-parallel simulation of the multiplexer (see lib/Simulator.py)
+            High impedance is simulated as '0'.
 
-class MuxWindow(QWidget):
-    accept = pyqtSignal(list)
-
-    def __init__(self,parent = None):
-        super().__init__()
-        self.ui = uic.loadUi("blocks\\Standard Library\\Multiplexer.ui",self)
-        self.ui.acceptButton.clicked.connect(self.accepted)
-
-    def accepted(self):
-        numInput = self.ui.numInput.value()
-        sizeInput = self.ui.sizeInput.value()
-        includeEnabler = self.ui.enabler.isChecked()
-        if includeEnabler:
-            activeSymbol = '0' if self.ui.symb0.isChecked() else '1'
-        else:
-            activeSymbol = None
-        defaultOutput = '0' if self.ui.defOut0.isChecked() else ('1' if self.ui.defOut1.isChecked() else 'Z')
+        :array[] inputs:    Packed value of each input port (one row per bit)
+        """
+        select = inputs[self.numMuxIn]
+        chosen = inputs[0] & 0
+        matched = select[0] & 0     # Vectors where the selector chooses an input
 
-        self.accept.emit([numInput,sizeInput,defaultOutput,includeEnabler,activeSymbol])
-        self.close()
+        for i in range(self.numMuxIn):
+            match = ~matched | matched
+            for k in range(self.selBits):
+                match = match & (select[k] if (i >> k) & 1 else ~select[k])
+            chosen = chosen | (inputs[i] & match)
+            matched = matched | match
 
+        if self.defaultOutput[0] == "1":
+            chosen = chosen | ~matched
 
+        if self.enabler == True:
+            enabled = inputs[self.numMuxIn + 1][0]
+            chosen = chosen & (enabled if self.enablerActiveSymbol == "1" else ~enabled)
+        return [chosen]
+
+
+if QWidget != None:
+    class MuxWindow(QWidget):
+        accept = pyqtSignal(list)
+
+        def __init__(self,parent = None):
+            super().__init__()
+            self.ui = lib.FormCache.loadUi("blocks\\Standard Library\\Multiplexer.ui",self)
+            self.ui.acceptButton.clicked.connect(self.accepted)
+
+        def accepted(self):
+            numInput = self.ui.numInput.value()
+            sizeInput = self.ui.sizeInput.value()
+            includeEnabler = self.ui.enabler.isChecked()
+            if includeEnabler:
+                activeSymbol = '0' if self.ui.symb0.isChecked() else '1'
+            else:
+                activeSymbol = None
+            defaultOutput = '0' if self.ui.defOut0.isChecked() else ('1' if self.ui.defOut1.isChecked() else 'Z')
+
+            self.accept.emit([numInput,sizeInput,defaultOutput,includeEnabler,activeSymbol])
+            self.close()
@@ -0,0 +1,51 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Generation Worker
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+from PyQt4.QtCore import *
+
+class GenerationWorker(QThread):
+    progress = pyqtSignal(int,int)      # Blocks generated, total blocks
+    generated = pyqtSignal(str)         # VHDL code of the system
+    failed = pyqtSignal(str)            # Description of the error
+
+    def __init__(self, system, store = None, parent = None):
+        """ Thread that generates the VHDL code of a system.
+            It works on a snapshot of the system (see System.snapshot), so the
+            system can be edited while the code is generated.
+
+        :System system:         System to be generated. The snapshot is taken here, on the GUI thread.
+        :FragmentStore store:   Disk cache of the code of the blocks (optional)
+        """
+        super().__init__(parent)
+        self.system = system.snapshot()
+        self.store = store
+        self.cancelled = False
+
+    def cancel(self):
+        """ Stop the generation. It stops after the block that is being generated.
+        """
+        self.cancelled = True
+
+    def run(self):
+        system = self.system
+        total = len(system.block)
+        try:
+            # Code of each block, it is saved on the fragment cache of the snapshot
+            for ind,block in enumerate(system.block):
+                if self.cancelled:
+                    return
+                system.fragment(block,self.store)
+                self.progress.emit(ind + 1,total)
+
+            if self.cancelled:
+                return
+            # The text is read again if a block was modified while it was read
+            self.generated.emit(system.read(system.buildVHDLCode))
+        except Exception as error:
+            self.failed.emit(str(error))
@@ -8,43 +8,71 @@
 __author__ = "BlakeTeam"
 
 import os
-import importlib
 import pickle
 import _pickle
 import data.constants
 import data.NewProject
-import plugin.parametrizer
+import data.GenerationWorker
+import lib.BlockRegistry
+import lib.ProjectFile
 
 from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 from PyQt4 import uic
 
+import lib.FormCache
+
 from visual import *
 from lib import *
+from lib.ProjectInterface import *
+
+def icon(path):
+    """ Property with the icon of a file. The file is read the first time the icon is used.
+    """
+    def get(self):
+        if not path in self.icons:
+            self.icons[path] = QIcon(path)
+        return self.icons[path]
+    return property(get)
 
 class MainWindow(QMainWindow):
+    standardIco = icon("resources\\standard.ico")
+    parameterIco = icon("resources\\parameter.ico")
+    dynamicIco = icon("resources\\dynamic.ico")
+    folderIco = icon("resources\\folder.ico")
+    projectIco = icon("resources\\project.png")
+
     def __init__(self):
         super().__init__()
         self.projects = {}                  # All projects {string dirName: IProject project }
+        self.workspace = {}                 # Projects on the default directory {string name: (string path, QTreeWidgetItem item)}
         self.dynamicProjectTable = [None]   # All projects opened (on tabs) {int tabIndex: IProject project }
         self.currentProject = None          # Project that is being used on each moment
 
         self.defaultDirectory = os.getenv("USERPROFILE") + r"\VHDL Code Generator\Projects"
 
-        self.blocks = []    # Reference to the blocks to be loaded. <QItem:Path,Type,Mod>
+        self.blocks = []    # Reference to the blocks to be loaded. <QItem:Path,Type,BlockEntry>
         self.tempBlocks = []
+        self.registry = lib.BlockRegistry.registry()    # Metadata of the block library
 
         self.state = data.constants.DEFAULT_MODE
 
         self.dynamicBlock = None    # Current loaded dynamic block
         self.parameters = None      # Parameters that receive the current loaded dynamic block
 
+        self.generationWorker = None    # Thread generating the code of a project
+
         self.initializeUI()
 
+        # Changes are written on the journal of each project periodically
+        self.autosaveTimer = QTimer(self)
+        self.autosaveTimer.timeout.connect(self.autosave)
+        self.autosaveTimer.start(data.constants.AUTOSAVE_INTERVAL)
+
     def initializeUI(self):
         """ Initialize all graphics components of the Main Window.
         """
-        self.ui = uic.loadUi('mainWindow.ui', self)
+        self.ui = lib.FormCache.loadUi('mainWindow.ui', self)
 
         self.loadIcons()
         # self.initializeToolBar()
@@ -54,11 +82,13 @@ class MainWindow(QMainWindow):
         self.ui.Explorer.closeEvent = lambda event: self.ui.actionExplorer.toggle()
 
 
-        self.ui.actionBlock_Parametrizer.triggered.connect(plugin.parametrizer.exec)
+        self.ui.actionBlock_Parametrizer.triggered.connect(self.openParametrizer)
         self.ui.action_Save.triggered.connect(self.save)
         self.ui.action_New_System.triggered.connect(self.create)
         self.ui.action_Load.triggered.connect(self.loadProject)
         self.ui.action_Generate_Code.triggered.connect(self.buildVHDLCode)
+        self.ui.action_Cancel_Generation.triggered.connect(self.cancelGeneration)
+        self.ui.action_Auto_Layout.triggered.connect(self.autoLayout)
         self.ui.tabExplorer.tabCloseRequested.connect(self.removeTab)
         self.ui.tabExplorer.currentChanged.connect(self.changeTab)
 
@@ -67,21 +97,32 @@ class MainWindow(QMainWindow):
         self.ui.toolBar.addAction(self.ui.action_Set_Default_Mode)
         self.ui.action_Set_Default_Mode.setIcon(self.setDefaultModeIcon)
 
+        # Progress of the code generation
+        self.generationProgress = QProgressBar()
+        self.generationProgress.setMaximumWidth(200)
+        self.generationProgress.hide()
+        self.ui.statusbar.addPermanentWidget(self.generationProgress)
+
         ### Tree Widget ###
 
         # Blocks
         self.ui.blockTree.setHeaderLabels(["Blocks"])
         self.ui.blockTree.itemDoubleClicked.connect(self.blockSelected)
-        self.loadBlocks()
         self.refreshBlocks()
-        print(self.blocks)
 
         # Explorer
         self.ui.explorerTree.setHeaderLabels(["Project Explorer"])
         self.ui.explorerTree.itemDoubleClicked.connect(self.projectSelected)
+        self.loadWorkspace()
 
-    def parametrizer(self):
+    def openParametrizer(self):
+        """ Show the Block Parametrizer. Its module is imported the first time it is used.
+        """
+        import plugin.parametrizer
         plugin.parametrizer.exec()
+
+    def parametrizer(self):
+        self.openParametrizer()
         self.refreshBlocks()
         print("QUE VOLA")
 
@@ -93,12 +134,76 @@ class MainWindow(QMainWindow):
         print(len(self.blocks))
 
     def buildVHDLCode(self):
-        print(self.currentProject.system.buildVHDLCode())
+        """ Generate the code of the current project on other thread.
+            The project can be edited while it is generated.
+        """
+        if self.currentProject == None:
+            print("There is no project selected")
+            return
+        self.cancelGeneration()
+
+        worker = data.GenerationWorker.GenerationWorker(self.currentProject.system,parent = self)
+        worker.progress.connect(self.generationProgressed)
+        worker.generated.connect(self.generationFinished)
+        worker.failed.connect(self.generationFailed)
+        worker.finished.connect(lambda: self.generationStopped(worker))
+        worker.finished.connect(worker.deleteLater)
+        self.generationWorker = worker
+
+        self.generationProgress.setRange(0,max(1,len(worker.system.block)))
+        self.generationProgress.setValue(0)
+        self.generationProgress.show()
+        self.ui.action_Cancel_Generation.setEnabled(True)
+        self.ui.statusbar.showMessage("Generating %s"%worker.system.name)
+        worker.start()
+
+    def cancelGeneration(self):
+        if self.generationWorker != None:
+            self.generationWorker.cancel()
+            self.ui.statusbar.showMessage("Generation cancelled",3000)
+            self.generationStopped(self.generationWorker)
+
+    def generationProgressed(self,done,total):
+        if self.sender() is self.generationWorker:
+            self.generationProgress.setValue(done)
+
+    def generationFinished(self,code):
+        if not self.sender() is self.generationWorker:
+            return  # Cancelled
+        # The code of the blocks that weren't modified is reused by the next generation
+        self.generationWorker.system.publish()
+        self.ui.statusbar.showMessage("Code generated",3000)
+        print(code)
+
+    def generationFailed(self,error):
+        if not self.sender() is self.generationWorker:
+            return  # Cancelled
+        message = QMessageBox(self)
+        message.setWindowTitle("ERROR")
+        message.setIcon(QMessageBox.Critical)
+        message.setText("The code couldn't be generated.\n" + error)
+        message.exec()
+
+    def generationStopped(self,worker):
+        # A cancelled worker can finish after other generation started
+        if worker is self.generationWorker:
+            self.generationWorker = None
+            self.generationProgress.hide()
+            self.ui.action_Cancel_Generation.setEnabled(False)
 
     def save(self):
         try:
-            print("IT WILL SAVE")
-            # self.currentProject.save()
+            self.currentProject.save()
+        except AttributeError:
+            print("There is no project selected")
+
+    def autosave(self):
+        for project in self.projects.values():
+            project.autosave()
+
+    def autoLayout(self):
+        try:
+            self.currentProject.autoLayout()
         except AttributeError:
             print("There is no project selected")
 
@@ -126,26 +231,27 @@ class MainWindow(QMainWindow):
 
         else:
             founded = False
-            for _item,path,type,mod in self.blocks:
+            for _item,path,type,entry in self.blocks:
                 if item == _item:
                     founded = True
                     print("LOADING",path)
-                    self.loadBlock(path,type,mod)
+                    self.loadBlock(path,type,entry)
                     break
             if not founded:
                 print("NO ITEM SELECTED")
 
-    def loadBlock(self,path,type,mod = None):
-        """ Loading selected block to the current system
+    def loadBlock(self,path,type,entry = None):
+        """ Loading selected block to the current system.
+            The module of the block is imported here, the first time it is used.
         """
         print(path,type)
 
         if type == data.constants.STATIC_BLOCK:
             pass
         elif type == data.constants.PARAMETRIC_BLOCK:
-            self.loadParametricBlock(path,mod)
+            self.loadParametricBlock(path,self.registry.load(entry))
         elif type == data.constants.DYNAMIC_BLOCK:
-            self.loadDynamicBlock(mod)
+            self.loadDynamicBlock(self.registry.load(entry))
 
         # TODO: Set state to Block insertion if static and parametric mode, the view of the curProject too
 
@@ -173,11 +279,9 @@ class MainWindow(QMainWindow):
             self.ui.action_Set_Default_Mode.setChecked(False)
 
     def loadIcons(self):
-        self.standardIco = QIcon("resources\\standard.ico")
-        self.parameterIco = QIcon("resources\\parameter.ico")
-        self.dynamicIco = QIcon("resources\\dynamic.ico")
-        self.folderIco = QIcon("resources\\folder.ico")
-        self.projectIco = QIcon("resources\\project.png")
+        """ Icons are loaded when they are used (see icon)
+        """
+        self.icons = {}     # {string path: QIcon}
 
     @staticmethod
     def isParameterBlock(path):
@@ -191,19 +295,13 @@ class MainWindow(QMainWindow):
         """
         return os.path.splitext(path)[1] == ".svb"
 
-    @staticmethod
-    def isDynamicBlock(path):
+    def isDynamicBlock(self,path):
         """ Check if the file refers to a dynamic block
-            It returns the module if it is a dynamic block
+            It returns the registry entry if it is a dynamic block
         """
-        if os.path.splitext(path)[1] == ".py":
-            name = os.path.splitext(os.path.split(path)[1])[0]
-            mod = importlib.__import__(name)
-            try:
-                if mod.__isBlock__:
-                    return mod
-            except:
-                return False
+        entry = self.registry.lookup(path)
+        if entry != None and entry.type == data.constants.DYNAMIC_BLOCK:
+            return entry
         return False
 
     def __loadBlockFromDir__(self,item,path):
@@ -233,19 +331,20 @@ class MainWindow(QMainWindow):
                 # Parametric Block
                 elif self.isParameterBlock(curPath):
                     # Loading the name of the class of the dynamic block that build it
-                    dynamicBlockName = self.parameterName(curPath)
-                    mod = self.findModule(dynamicBlockName)
+                    entry = self.registry.lookup(curPath)
+                    if entry != None:
+                        entry = self.findModule(entry.className)
 
-                    if mod != None:
+                    if entry != None:
                         fileItems.append((child,self.parameterIco))
-                        self.tempBlocks.append((child,curPath,data.constants.PARAMETRIC_BLOCK,mod))
+                        self.tempBlocks.append((child,curPath,data.constants.PARAMETRIC_BLOCK,entry))
                         files = True
                 else:
-                    mod = self.isDynamicBlock(curPath)
+                    entry = self.isDynamicBlock(curPath)
                     # Dynamic Block
-                    if mod:
+                    if entry:
                         fileItems.append((child,self.dynamicIco))
-                        self.tempBlocks.append((child,curPath,data.constants.DYNAMIC_BLOCK,mod))
+                        self.tempBlocks.append((child,curPath,data.constants.DYNAMIC_BLOCK,entry))
                         files = True
         for i in dirItems:
             item.addChild(i)
@@ -255,6 +354,7 @@ class MainWindow(QMainWindow):
         return files
 
     def loadBlocks(self):
+        self.registry.scan()    # Only new or modified files are examined
         os.chdir("blocks")
         path = os.getcwd()
         for i in os.listdir():
@@ -272,14 +372,10 @@ class MainWindow(QMainWindow):
         self.tempBlocks = []
 
     def findModule(self,name):
-        """ Find a dynamic block with the given name and return the loaded module
-            of it.
+        """ Find a dynamic block with the given name and return its registry entry.
+            The module is loaded with self.registry.load(entry)
         """
-        for child,path,_type,mod in self.blocks:
-            if name == mod.__className__:
-                print(path)
-                return mod
-        return None
+        return self.registry.find(name)
 
     def parameterData(self,path):
         """ Get the name and arguments of the dynamic block that build the parametric block chosen
@@ -301,6 +397,31 @@ class MainWindow(QMainWindow):
         dialog.show()
         dialog.fileSelected.connect(self.loadFile)
 
+    def loadWorkspace(self):
+        """ List the projects of the default directory on the explorer.
+            Only the header of each file is read, a project is loaded when it is opened.
+        """
+        if not os.path.isdir(self.defaultDirectory):
+            return
+
+        for fileName in sorted(os.listdir(self.defaultDirectory)):
+            if os.path.splitext(fileName)[1] != ".vcgp":
+                continue
+            path = os.path.join(self.defaultDirectory,fileName)
+            try:
+                header = lib.ProjectFile.readHeader(path)
+            except Exception as error:
+                # Empty or truncated files, legacy projects with blocks that are not available...
+                print("Skipping project %s: %s: %s"%(path,type(error).__name__,error))
+                continue
+
+            item = QTreeWidgetItem()
+            item.setText(0,header["name"])
+            item.setIcon(0,self.projectIco)
+            item.setToolTip(0,"%d blocks, %d inputs, %d outputs"%(header["blocks"],len(header["input_info"]),len(header["output_info"])))
+            self.ui.explorerTree.addTopLevelItem(item)
+            self.workspace[header["name"]] = (path,item)
+
     def loadFile(self,file):
         try:
             project = IProject.load(file)
@@ -318,10 +439,11 @@ class MainWindow(QMainWindow):
                 self.ui.tabExplorer.setCurrentWidget(project.view)
 
                 # Creating element in the explorer Tree
-                item = QTreeWidgetItem()
-                item.setText(0,name)
-                item.setIcon(0,self.projectIco)
-                self.ui.explorerTree.addTopLevelItem(item)
+                if not name in self.workspace:
+                    item = QTreeWidgetItem()
+                    item.setText(0,name)
+                    item.setIcon(0,self.projectIco)
+                    self.ui.explorerTree.addTopLevelItem(item)
 
         except _pickle.UnpicklingError:
             message = QMessageBox(self)
@@ -329,6 +451,10 @@ class MainWindow(QMainWindow):
             message.exec()
 
     def projectSelected(self,item,column):
+        if not item.text(0) in self.projects:
+            # Project listed on the workspace, it is loaded the first time it is opened
+            self.loadFile(self.workspace[item.text(0)][0])
+            return
         project = self.projects[item.text(0)]
         try:
             index = self.dynamicProjectTable.index(project)
@@ -396,11 +522,13 @@ class MainWindow(QMainWindow):
             print(self.dynamicBlock)
             print(self.parameters)
             block = self.dynamicBlock(self.currentProject.system,*self.parameters)
-            self.currentProject.system.block.append(block)
             block.screenPos = x,y
+            self.currentProject.system.addBlock(block)
             visualBlock = QBlock(block, self.currentProject.view)
             self.currentProject.scene.addItem(visualBlock)
             visualBlock.setPos(x,y)
+            if self.currentProject.view.virtualizer != None:
+                self.currentProject.view.virtualizer.addBlock(block,visualBlock)
             self.setDefaultMode()
 
         elif self.state == data.constants.DEFAULT_MODE:
@@ -11,6 +11,8 @@ from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 from PyQt4 import uic
 
+import lib.FormCache
+
 from data.PortConfigurationWindow import *
 
 class NProjectWindow(QWidget):
@@ -23,7 +25,7 @@ class NProjectWindow(QWidget):
     def initializeUI(self):
         """ Initialize all graphics components of the New Project Window
         """
-        self.ui = uic.loadUi('newProject.ui',self)
+        self.ui = lib.FormCache.loadUi('newProject.ui',self)
         self.ui.name.textChanged.connect(self.textChanged)
         self.ui.acceptButton.clicked.connect(self.accept)
         self.ui.cancelButton.clicked.connect(self.cancel)
@@ -11,6 +11,8 @@ from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 from PyQt4 import uic
 
+import lib.FormCache
+
 from visual.PortConfiguration import *
 
 class PortConfigurationWindow(QWidget):
@@ -36,7 +38,7 @@ class PortConfigurationWindow(QWidget):
     def initializeUI(self):
         """ Initialize all graphics components of the New Project Window
         """
-        self.ui = uic.loadUi('PortConfiguration.ui',self)
+        self.ui = lib.FormCache.loadUi('PortConfiguration.ui',self)
         self.setWindowTitle(self.name)
         self.ui.input.setText(str(self.totInputPorts))
         self.ui.output.setText(str(self.totOutputPorts))
@@ -3,9 +3,8 @@
 #   NAME:      data Modules
 #
 
-from .MainWindow import *
-from .NewProject import *
-from .PortConfigurationWindow import *
+# The windows (MainWindow, NewProject, PortConfigurationWindow) are imported
+# from their modules, so data.constants can be used without PyQt4 (see generate.py)
 
 WIDTH = 400
 HEIGHT = 200
\ No newline at end of file
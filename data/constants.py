@@ -5,6 +5,9 @@ DYNAMIC_BLOCK = 2
 DEFAULT_MODE = 0    # MOVE & CONNECT MODE
 BLOCK_INSERTION = 1
 
+AUTOSAVE_INTERVAL = 5000    # Milliseconds between autosaves of the journal
+VIRTUAL_SCENE_BLOCKS = 2000 # Projects with more blocks only create the items of the visible blocks
+
 IN = 1
 OUT = 0
 
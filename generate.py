@@ -0,0 +1,127 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      generate
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+# Headless generator: .vcgp -> .vhd without the graphic interface.
+#
+#   python generate.py [-o OUTPUT_DIR] [-j JOBS] project.vcgp|directory ...
+
+__author__ = "BlakeTeam"
+
+import sys
+import os
+import argparse
+import concurrent.futures
+
+root_dir = os.path.abspath(os.path.dirname(__file__))
+blocks_dir = os.path.join(root_dir, 'blocks')
+
+sys.path.append(root_dir)
+
+# Dynamic blocks are saved with the name of their module, so every
+# library directory must be importable to load the projects.
+for library in sorted(os.listdir(blocks_dir)):
+    if os.path.isdir(os.path.join(blocks_dir, library)):
+        sys.path.append(os.path.join(blocks_dir, library))
+
+from lib import ProjectFile
+from lib.FragmentStore import FragmentStore
+from lib.OutputWriter import OutputWriter
+
+EXTENSION = ".vcgp"
+
+def findProjects(paths):
+    """ List all project files given on the command line.
+        Directories are searched recursively.
+    """
+    projects = []
+    for path in paths:
+        if os.path.isdir(path):
+            for curDir, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1] == EXTENSION:
+                        projects.append(os.path.join(curDir, name))
+        else:
+            projects.append(path)
+    return projects
+
+def outputPath(project, outputDir = None):
+    """ Path of the .vhd file generated for a project.
+        By default it is written next to the project file.
+    """
+    directory, name = os.path.split(project)
+    name = os.path.splitext(name)[0] + ".vhd"
+    return os.path.join(outputDir if outputDir != None else directory, name)
+
+class InvalidProject(Exception):
+    pass
+
+_stores = {}    # Fragment stores opened by this process {string root: FragmentStore}
+
+def openStore(root, maxSize):
+    if root == None:
+        return None
+    if not root in _stores:
+        _stores[root] = FragmentStore(root, maxSize)
+    return _stores[root]
+
+def generateProject(project, outputDir = None, cacheDir = None, cacheSize = None, blockJobs = 1, deterministic = False):
+    """ Generate the VHDL code of a project file.
+        The file is only rewritten if its content changed.
+        It returns the path of the generated file & True if it was rewritten.
+    """
+    system = ProjectFile.loadSystem(project)
+    problems = system.validate()
+    if len(problems) != 0:
+        raise InvalidProject("; ".join(problems))
+    path = outputPath(project, outputDir)
+    store = openStore(cacheDir, cacheSize)
+    with OutputWriter(path) as file:
+        system.emitVHDL(file, store, blockJobs, deterministic = deterministic, cache = False)
+    return path, file.changed
+
+def report(project, path, changed):
+    print("%s -> %s%s"%(project, path, "" if changed else " (unchanged)"))
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Generate the VHDL code of VHDL Code Generator projects.")
+    parser.add_argument("projects", nargs = "+", help = "project files (%s) or directories with projects"%EXTENSION)
+    parser.add_argument("-o", "--output", default = None, help = "directory where .vhd files are written (default: next to each project)")
+    parser.add_argument("-j", "--jobs", type = int, default = 1, help = "number of projects generated in parallel")
+    parser.add_argument("-d", "--deterministic", action = "store_true", help = "the same project always generates the same file, so unchanged files are not rewritten")
+    parser.add_argument("--block-jobs", type = int, default = 1, help = "number of processes rendering the blocks of each project")
+    parser.add_argument("--cache", default = None, help = "directory of the cache of generated blocks, shared between projects")
+    parser.add_argument("--cache-size", type = int, default = 256, help = "maximum size of the cache in MB (default: 256)")
+    args = parser.parse_args(argv)
+
+    projects = findProjects(args.projects)
+    if args.output != None and not os.path.isdir(args.output):
+        os.makedirs(args.output)
+
+    cacheSize = args.cache_size*1024*1024
+    failed = 0
+    if args.jobs > 1 and len(projects) > 1:
+        with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            futures = [executor.submit(generateProject, project, args.output, args.cache, cacheSize, args.block_jobs, args.deterministic) for project in projects]
+            for project, future in zip(projects, futures):
+                try:
+                    report(project, *future.result())
+                except Exception as error:
+                    failed += 1
+                    print("%s: ERROR %s"%(project, error), file = sys.stderr)
+    else:
+        for project in projects:
+            try:
+                report(project, *generateProject(project, args.output, args.cache, cacheSize, args.block_jobs, args.deterministic))
+            except Exception as error:
+                failed += 1
+                print("%s: ERROR %s"%(project, error), file = sys.stderr)
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
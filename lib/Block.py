@@ -7,8 +7,6 @@
 
 __author__ = "BlakeTeam"
 
-from visual.BlockVisual import *
-
 IN = 1
 OUT = 0
 TEMP = 2
@@ -20,6 +18,8 @@ class Block:
 
         This is the generic block.
     """
+    revision = 0    # Changes every time the block is modified (see touch)
+
     def __init__(self, input_vector, output_vector, system, name = None):
         """ Structure that handles an abstract Block.
             Each block has a name(string) that is given by default for the system.
@@ -29,12 +29,14 @@ class Block:
         :System system:           Reference to the system where this block belong.
         """
         # Comprehension list that generates list of ports initialized by default
-        self.input_ports = [Port("in"+str(i),input_vector[i],IN) for i in range(len(input_vector))]
-        self.output_ports = [Port("out"+str(i),output_vector[i],OUT) for i in range(len(output_vector))]
+        self.input_ports = [Port(Block.defaultPortName(i,IN),input_vector[i],IN,self) for i in range(len(input_vector))]
+        self.output_ports = [Port(Block.defaultPortName(i,OUT),output_vector[i],OUT,self) for i in range(len(output_vector))]
 
         self.system = system
         self.variables = [] # Variables(SIGNALS) to be used on the block
+        self.buildIndex()
 
+        self.name = None    # Dynamic blocks set it before, but it is not reserved yet
         if name == None:
             self.name = self.get_name()
         else:
@@ -43,6 +45,39 @@ class Block:
         # Position on the screen to visualize the block
         self.screenPos = (0,0)
 
+    def touch(self):
+        """ Mark the block as modified.
+            Every method that changes the generated code of the block must call it,
+            so the system knows that its cached code is not valid anymore.
+        """
+        self.revision += 1
+
+    def buildIndex(self):
+        """ Build the index of the names of ports & variables.
+            signal_index = {String name: (Int position, IN/OUT/TEMP)}
+        """
+        self.signal_index = {}
+        for mode,signals in ((TEMP,self.variables),(OUT,self.output_ports),(IN,self.input_ports)):
+            for pos,signal in enumerate(signals):
+                self.signal_index[signal[0] if mode == TEMP else signal.name] = (pos,mode)
+
+    @staticmethod
+    def defaultPortName(pos,mode):
+        """ Name given to a port when the block is created: in0, in1, ..., out0, out1, ...
+        """
+        return ("in" if mode == IN else "out") + str(pos)
+
+    def checkName(self,name,pos,mode):
+        """ Raise InvalidName if name is used by other port or variable of the block.
+            A port that still has its default name doesn't reserve it, so ports
+            can be renamed in any order (in0 -> in1 while in1 is not renamed yet)
+        """
+        used = self.signal_index.get(name)
+        if used != None and used != (pos,mode):
+            if used[1] != TEMP and name == Block.defaultPortName(*used):
+                return
+            raise InvalidName("There is already a port or variable called %s on %s"%(name,self.name))
+
     def getVariableSignalSize(self,index):
         return self.variables[index][1]
 
@@ -66,15 +101,31 @@ class Block:
         """
         return "%s__%s"%(self.name,name)
 
-    # TODO: validate the name, there cant be 2 ports with the same name (Variables too)
     def addVariable(self,name,size):
-        self.variables.append((name,size))
+        """ Add a variable (signal) to the block.
+            There can't be 2 ports or variables with the same name.
+        """
+        self.checkName(name,len(self.variables),TEMP)
+        with self.system.lock:
+            self.system.changing(self)
+            self.signal_index[name] = (len(self.variables),TEMP)
+            self.variables.append((name,size))
+            self.touch()
 
     def setInputName(self,name,index):
-        self.getInputPort(index).name = name
+        self.renamePort(self.getInputPort(index),name,index,IN)
 
     def setOutputName(self,name,index):
-        self.getOutputPort(index).name = name
+        self.renamePort(self.getOutputPort(index),name,index,OUT)
+
+    def renamePort(self,port,name,index,mode):
+        self.checkName(name,index,mode)
+        with self.system.lock:
+            self.system.changing(self)
+            if self.signal_index.get(port.name) == (index,mode):
+                del self.signal_index[port.name]
+            self.signal_index[name] = (index,mode)
+            port.setName(name)
 
     def getInputPort(self,index):
         return self.input_ports[index]
@@ -83,23 +134,35 @@ class Block:
         return self.output_ports[index]
 
     def getCoords(self,mode,index):
+        from visual.BlockVisual import QBlock   # The abstract model doesn't need Qt
+
         if mode == IN:
             return self.screenPos[0] - QBlock.PORT_SIZE,self.screenPos[1] + (index + 1)*(QBlock.DX*(max(len(self.block.input_ports), len(self.block.output_ports))+1)/len(self.input_ports))
         else:
             return self.screenPos[0] + QBlock.PORT_SIZE + QBlock.WIDTH, self.screenPos[1] + (index + 1)*(QBlock.DX*(max(len(self.block.input_ports), len(self.block.output_ports))+1)/len(self.output_ports))
 
+    def detached(self,system = None):
+        """ Copy of the block without references to the system or other blocks.
+            It keeps everything needed to generate its code, so it can be sent
+            to other processes. Its ports are not connected.
+
+        :System system:     System of the copy (None by default)
+        """
+        copy = self.__class__.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        copy.system = system
+        copy.input_ports = [Port(i.name,i.size,i.mode,copy) for i in self.input_ports]
+        copy.output_ports = [Port(i.name,i.size,i.mode,copy) for i in self.output_ports]
+        copy.variables = list(self.variables)
+        copy.signal_index = dict(self.signal_index)
+        return copy
+
     def get_name(self):
         """ Return a valid name for the block.
             A name that is not in the list of names in the current system.
         """
-        ind = 0
-        while True:
-            name = "block" + str(ind)
-            if not name in self.system.block_name:
-                self.system.block_name.add(name)
-                return name
-            else:
-                ind += 1
+        return self.system.reserveDefaultName()
+
     def generate(self):
         """ Method to be overridden. It generates the VHDL code.
         """
@@ -130,15 +193,10 @@ class Block:
 
         :String name: The name of the wanted port/
         """
-        try:
-            pos = self.input_ports.index(name)
-            return pos,IN
-        except ValueError:
-            try:
-                pos = self.output_ports.index(name)
-                return pos,OUT
-            except ValueError:
-                return -1
+        found = self.signal_index.get(name)
+        if found == None or found[1] == TEMP:
+            return -1
+        return found
 
     def setName(self,name):
         """ Set the name of the current block.
@@ -146,48 +204,111 @@ class Block:
 
         :String name:      The new name of this block.
         """
-        # Check that the new name do not already exist
-
-        if name in self.system.block_name:
-            pos = 2
-            while True:
-                curName = name + "_" + str(pos)
-                if not curName in self.system.block_name:
-                    name = curName
-                    break
-                else:
-                    pos += 1
-
-        try:
-            self.system.block_name.remove(self.name)
-        except KeyError:
-            pass
-        self.system.block_name.add(name)
-        self.name = name
+        # If the new name already exists it is renamed as name_2, name_3, ...
+        with self.system.lock:
+            self.system.changing(self)
+            old = self.name
+            if old != None:
+                self.system.releaseName(old)
+            self.name = self.system.reserveName(name)
+
+            # Every signal of this block and of the blocks it drives is renamed
+            self.touch()
+            for port in self.output_ports:
+                for conn in port.connection:
+                    conn.in_block.touch()
+
+        if old != None:
+            self.system.record("rename",old,self.name)
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        if not "signal_index" in state:
+            # Saved before the index existed
+            self.buildIndex()
+        # Ports saved before they had a block must still mark it as modified (see Port.touch)
+        for port in self.input_ports + self.output_ports:
+            port.block = self
+
+class InvalidName(BaseException):
+    pass
 
 class Port:
-    def __init__(self,name,size,mode):
+    # Wide blocks have thousands of ports, so they don't have a __dict__
+    __slots__ = ("name","size","mode","block","pin","_connection")
+
+    EMPTY = ()  # Fan-out of every output port without connections
+
+    def __init__(self,name,size,mode,block = None):
         """ Structure that handles an abstract port.
             Each Port has a connection property,
             If the mode is IN:
                 connection property is a reference to other port of mode OUT.
             If the mode is OUT:
                 connection property is an array of Ports of mode IN.
+                The array is only allocated when the first connection is added.
             connection is the one who keep the links between blocks.
 
         :String name:   Name of the port.
         :Int size:      The total of bits that the port handles.
         :IN/OUT mode:   Mode of the port.
+        :Block block:   Block that owns the port.
         """
         self.name = name
         self.size = size
         self.mode = mode
+        self.block = block
         self.pin = None
-
-        if self.mode == IN:
-            self.connection = None
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self.mode == OUT and self._connection == None:
+            return Port.EMPTY
+        return self._connection
+
+    @connection.setter
+    def connection(self,value):
+        if self.mode == OUT and not value:
+            value = None
+        self._connection = value
+
+    def addConnection(self,conn):
+        """ Add a connection to the fan-out of an output port.
+        """
+        if self._connection == None:
+            self._connection = [conn]
         else:
-            self.connection = []
+            self._connection.append(conn)
+
+    def touch(self):
+        """ Mark the block that owns this port as modified.
+        """
+        if self.block != None:
+            self.block.touch()
+
+    def setName(self,name):
+        self.name = name
+        self.touch()
+        if self.mode == OUT:
+            # Blocks driven by this port read its name
+            for conn in self.connection:
+                conn.in_block.touch()
+
+    def __getstate__(self):
+        # The pin is a graphic item, it is rebuilt when the block is drawn
+        return {"name":self.name,"size":self.size,"mode":self.mode,"block":self.block,
+                "pin":None,"connection":self._connection}
+
+    def __setstate__(self,state):
+        # Files saved before __slots__ have the state of the old __dict__
+        if isinstance(state,tuple):
+            state = dict(state[0] or {},**(state[1] or {}))
+        self.block = None
+        self.pin = None
+        self._connection = None
+        for name,value in state.items():
+            setattr(self,name,value)
 
     def __eq__(self, other):
         if isinstance(other,str):
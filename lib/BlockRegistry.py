@@ -0,0 +1,198 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Block Registry
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import ast
+import os
+import sys
+import pickle
+import importlib
+
+import data.constants
+
+MANIFEST = ".registry"      # Name of the manifest file on the blocks directory
+MANIFEST_VERSION = 1
+
+class BlockEntry:
+    def __init__(self,path,size,mtime):
+        """ Metadata of a file of the block library.
+            It is built without importing the module of the block.
+
+        :string path:   Absolute path of the file.
+        :int size:      Size of the file when it was examined.
+        :float mtime:   Modification time of the file when it was examined.
+        """
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+        self.type = None        # STATIC_BLOCK / PARAMETRIC_BLOCK / DYNAMIC_BLOCK, None if it is not a block
+        self.className = None   # Dynamic block: name of the class. Parametric block: name of the class that builds it
+        self.win = None         # Dynamic block: name of the window that ask for parameters
+
+    def moduleName(self):
+        return os.path.splitext(os.path.split(self.path)[1])[0]
+
+class BlockRegistry:
+    def __init__(self,root,manifest = None):
+        """ Registry of all the blocks in the library.
+            Block metadata is saved on a manifest keyed by path, size & mtime,
+            so only new or modified files are examined on each scan.
+            Modules are imported only when the block is used (see load).
+
+        :string root:       Directory of the block library.
+        :string manifest:   Path of the manifest file.
+        """
+        self.root = os.path.abspath(root)
+        self.manifest = manifest if manifest != None else os.path.join(self.root,MANIFEST)
+        self.entries = {}   # {string path: BlockEntry}
+        self.modules = {}   # Imported modules {string path: (float mtime, module)}
+
+        self.readManifest()
+
+    def readManifest(self):
+        try:
+            with open(self.manifest,"rb") as file:
+                version,entries = pickle.load(file)
+            if version == MANIFEST_VERSION:
+                self.entries = entries
+        except Exception:
+            # Missing or corrupted manifest, everything will be examined
+            self.entries = {}
+
+    def writeManifest(self):
+        try:
+            with open(self.manifest,"wb") as file:
+                pickle.dump((MANIFEST_VERSION,self.entries),file)
+        except OSError:
+            # Read only library, the manifest is only kept on memory
+            pass
+
+    def scan(self):
+        """ Update the registry with the current content of the library.
+            Return True if something changed.
+        """
+        entries = {}
+        changed = False
+        for curDir,dirs,files in os.walk(self.root):
+            dirs[:] = [i for i in dirs if i != "__pycache__"]
+            for name in files:
+                path = os.path.join(curDir,name)
+                if path == self.manifest:
+                    continue
+                stat = os.stat(path)
+                entry = self.entries.get(path)
+                if entry == None or entry.size != stat.st_size or entry.mtime != stat.st_mtime:
+                    entry = self.examine(path,stat.st_size,stat.st_mtime)
+                    changed = True
+                entries[path] = entry
+
+        changed = changed or len(entries) != len(self.entries)
+        self.entries = entries
+        if changed:
+            self.writeManifest()
+        return changed
+
+    def examine(self,path,size,mtime):
+        """ Build the entry of a file.
+        """
+        entry = BlockEntry(path,size,mtime)
+        ext = os.path.splitext(path)[1]
+
+        if ext == ".svb":
+            entry.type = data.constants.STATIC_BLOCK
+        elif ext == ".pvb":
+            try:
+                with open(path,"rb") as file:
+                    entry.className = pickle.load(file)[0]
+                entry.type = data.constants.PARAMETRIC_BLOCK
+            except Exception:
+                pass
+        elif ext == ".py":
+            info = self.readModuleInfo(path)
+            if info.get("__isBlock__"):
+                entry.type = data.constants.DYNAMIC_BLOCK
+                entry.className = info.get("__className__")
+                entry.win = info.get("__win__")
+        return entry
+
+    def readModuleInfo(self,path):
+        """ Read __isBlock__, __className__ & __win__ from the source of a module.
+            If they are not literals the module is imported to read them.
+        """
+        names = ("__isBlock__","__className__","__win__")
+        info = {}
+        try:
+            with open(path,"rb") as file:
+                tree = ast.parse(file.read(),path)
+            for node in tree.body:
+                if isinstance(node,ast.Assign):
+                    for target in node.targets:
+                        if isinstance(target,ast.Name) and target.id in names:
+                            info[target.id] = ast.literal_eval(node.value)
+            return info
+        except (SyntaxError,ValueError):
+            pass
+        except OSError:
+            return info
+
+        try:
+            mod = self.importModule(path)
+        except Exception:
+            return {}
+        return dict((i,getattr(mod,i)) for i in names if hasattr(mod,i))
+
+    def lookup(self,path):
+        """ Entry of a file of the library, None if it is not a block.
+        """
+        entry = self.entries.get(os.path.abspath(path))
+        if entry == None or entry.type == None:
+            return None
+        return entry
+
+    def find(self,className):
+        """ Entry of the dynamic block with the given class name.
+        """
+        for entry in self.entries.values():
+            if entry.type == data.constants.DYNAMIC_BLOCK and entry.className == className:
+                return entry
+        return None
+
+    def load(self,entry):
+        """ Module of a dynamic block. It is imported the first time the block is used,
+            and imported again if the file changed since then.
+
+        :BlockEntry entry:  Entry of a dynamic block.
+        """
+        loaded = self.modules.get(entry.path)
+        if loaded != None and loaded[0] == entry.mtime:
+            return loaded[1]
+
+        mod = self.importModule(entry.path)
+        if loaded != None:
+            mod = importlib.reload(mod)
+        self.modules[entry.path] = (entry.mtime,mod)
+        return mod
+
+    @staticmethod
+    def importModule(path):
+        # Blocks are imported by the name of their file, from their directory
+        directory,name = os.path.split(path)
+        if not directory in sys.path:
+            sys.path.append(directory)
+        return importlib.import_module(os.path.splitext(name)[0])
+
+_registry = None
+
+def registry():
+    """ Registry shared by the whole application (library on ./blocks)
+    """
+    global _registry
+    if _registry == None:
+        _registry = BlockRegistry("blocks")
+    return _registry
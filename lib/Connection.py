@@ -10,6 +10,8 @@ __author__ = "BlakeTeam"
 from lib import *
 
 class Connection:
+    __slots__ = ("out_block","ind_output","in_block","ind_input","system","size")
+
     def __init__(self, out_block, ind_output, in_block, ind_input, system):
         """ Structure that handles the links between two Blocks(Ports)
             Each Connection has a name(string) that is given by default.
@@ -32,5 +34,15 @@ class Connection:
 
         self.size = out_block.output_ports[ind_output].size
 
+    def __getstate__(self):
+        return dict((name,getattr(self,name)) for name in Connection.__slots__)
+
+    def __setstate__(self,state):
+        # Files saved before __slots__ have the state of the old __dict__
+        if isinstance(state,tuple):
+            state = dict(state[0] or {},**(state[1] or {}))
+        for name,value in state.items():
+            setattr(self,name,value)
+
 class InvalidConnection(BaseException):
     pass
\ No newline at end of file
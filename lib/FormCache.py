@@ -0,0 +1,79 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Form Cache
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import importlib.util
+
+from PyQt4 import uic
+
+# Qt Designer forms (.ui) are compiled to python modules the first time they are
+# used, on the __pycache__ directory next to them. A form is compiled again only
+# when the .ui file is newer than its module, and each module is imported once
+# per session, so opening a window doesn't parse its XML.
+
+CACHE_DIR = "__pycache__"
+
+_forms = {}     # Form classes {string path: (float mtime, class)}
+
+def compiledPath(path):
+    directory,name = os.path.split(path)
+    return os.path.join(directory,CACHE_DIR,os.path.splitext(name)[0] + "_ui.py")
+
+def compileForm(path,target):
+    directory = os.path.dirname(target)
+    if not os.path.isdir(directory):
+        os.makedirs(directory,exist_ok = True)
+
+    temp = "%s.%d.tmp"%(target,os.getpid())
+    with open(path,"r",encoding = "utf-8") as source, open(temp,"w",encoding = "utf-8") as code:
+        uic.compileUi(source,code)
+    os.replace(temp,target)
+
+def formClass(path):
+    """ Class generated by uic for the form (Ui_...), with a setupUi method.
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime
+    cached = _forms.get(path)
+    if cached != None and cached[0] == mtime:
+        return cached[1]
+
+    target = compiledPath(path)
+    try:
+        stale = os.stat(target).st_mtime < mtime
+    except OSError:
+        stale = True
+    if stale:
+        compileForm(path,target)
+
+    spec = importlib.util.spec_from_file_location("_form_%x"%abs(hash(path)),target)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    form = next(value for name,value in vars(module).items() if name.startswith("Ui_") and isinstance(value,type))
+
+    _forms[path] = (mtime,form)
+    return form
+
+def loadUi(path,widget):
+    """ Same as uic.loadUi(path,widget), using the compiled form.
+        The widgets of the form are set as attributes of widget, which is returned.
+
+    :string path:       Path of the .ui file.
+    :QWidget widget:    Widget where the form is set up.
+    """
+    try:
+        form = formClass(path)()
+    except (OSError,SyntaxError,StopIteration):
+        # The form can't be compiled or the cache can't be written
+        return uic.loadUi(path,widget)
+
+    form.setupUi(widget)
+    for name,value in vars(form).items():
+        setattr(widget,name,value)
+    return widget
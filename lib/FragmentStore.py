@@ -0,0 +1,160 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Fragment Store
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import hashlib
+import importlib
+
+# Attributes of Block that are not parameters of the generated code,
+# or that are added to the key in other way.
+_IGNORED = frozenset(("system","input_ports","output_ports","variables","screenPos",
+                      "revision","signal_index","name"))
+_SIMPLE = (int,float,str,bool,type(None))
+# Modules that produce part of the code of every block (names of the signals, ...)
+_SHARED = ("lib.Block","lib.System")
+
+class FragmentStore:
+    def __init__(self,root,maxSize = 256*1024*1024):
+        """ Content-addressed cache, on disk, of the code generated by blocks.
+            The key of a block is the hash of its class, the source of its module
+            (& of the modules that name its signals, see _SHARED), its parameters and the names & sizes of its signals, so identical blocks
+            of different projects share the cached code.
+            The least recently used fragments are removed when the store is bigger than maxSize.
+
+        :string root:   Directory of the store.
+        :int maxSize:   Maximum size of the store in bytes.
+        """
+        self.root = root
+        self.maxSize = maxSize
+        self.moduleHash = {}    # {string path: (float mtime, string hash)}
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(root):
+            os.makedirs(root)
+        self.size = sum(size for path,size,mtime in self.files())
+
+    def files(self):
+        """ List (path,size,mtime) of every fragment on the store.
+        """
+        for curDir,dirs,files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".vhd"):
+                    path = os.path.join(curDir,name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path,stat.st_size,stat.st_mtime
+
+    def sourceHash(self,name):
+        """ Hash of the source of a module (given by its name)
+        """
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            return ""
+        path = getattr(module,"__file__",None)
+        if path == None:
+            return ""
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return ""
+        cached = self.moduleHash.get(path)
+        if cached == None or cached[0] != mtime:
+            with open(path,"rb") as file:
+                cached = (mtime,hashlib.sha256(file.read()).hexdigest())
+            self.moduleHash[path] = cached
+        return cached[1]
+
+    def key(self,block):
+        """ Key of the code generated by a block, None if it can't be cached
+            (it has parameters that are not plain values).
+        """
+        parameters = []
+        for name,value in sorted(block.__dict__.items()):
+            if name in _IGNORED:
+                continue
+            if not self.isPlain(value):
+                return None
+            parameters.append((name,value))
+
+        cls = type(block)
+        # The code depends on the module of the block & of its base classes
+        modules = sorted(set([i.__module__ for i in cls.__mro__ if i is not object] + list(_SHARED)))
+        text = repr((cls.__module__,cls.__name__,[self.sourceHash(i) for i in modules],parameters,block.name,
+                     [(p.name,p.size) for p in block.input_ports],
+                     [(p.name,p.size) for p in block.output_ports],
+                     list(block.variables)))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def isPlain(self,value):
+        if isinstance(value,_SIMPLE):
+            return True
+        if isinstance(value,(tuple,list)):
+            return all(self.isPlain(i) for i in value)
+        return False
+
+    def path(self,key):
+        return os.path.join(self.root,key[:2],key + ".vhd")
+
+    def generate(self,block):
+        """ Code of the block. It is read from the store if an identical block was
+            already generated, else it is generated and saved.
+        """
+        key = self.key(block)
+        if key == None:
+            return block.generate()
+
+        path = self.path(key)
+        try:
+            with open(path,"r",encoding = "utf-8",newline = "") as file:
+                text = file.read()
+            os.utime(path,None)     # Recently used
+            self.hits += 1
+            return text
+        except OSError:
+            pass
+
+        self.misses += 1
+        text = block.generate()
+        self.put(path,text)
+        return text
+
+    def put(self,path,text):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory,exist_ok = True)
+
+        # Other processes can be using the store: write on a temporal file & rename
+        temp = "%s.%d.tmp"%(path,os.getpid())
+        with open(temp,"w",encoding = "utf-8",newline = "") as file:
+            file.write(text)
+        os.replace(temp,path)
+
+        self.size += os.path.getsize(path)
+        if self.size > self.maxSize:
+            self.evict()
+
+    def evict(self):
+        """ Remove the least recently used fragments until the store uses
+            90% of its maximum size.
+        """
+        files = sorted(self.files(),key = lambda info: info[2])
+        self.size = sum(size for path,size,mtime in files)
+        limit = self.maxSize*9//10
+        for path,size,mtime in files:
+            if self.size <= limit:
+                break
+            try:
+                os.remove(path)
+                self.size -= size
+            except OSError:
+                pass
@@ -0,0 +1,211 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Journal
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import pickle
+import struct
+
+from . import ProjectFile
+
+# The journal of a project is an append-only file, next to the project file,
+# with every change made to the system since the project file was written:
+#
+#   ("base", generation)                    First record. Generation of the project file
+#   ("add", data)                           Block added (pickled with ProjectFile.dumps)
+#   ("remove", name)                        Block removed
+#   ("rename", old name, new name)          Block renamed
+#   ("move", name, (x,y))                   Block moved
+#   ("connect", out, ind out, in, ind in)   Connection created (blocks by name)
+#   ("disconnect", out, ind out, in, ind in)
+#
+# Each record is a pickle preceded by its length (uint32). A record that was
+# not completely written (the application crashed) ends the journal.
+# Moves are coalesced: only the last position of each block is written, before
+# the next record of other kind or on flush (a drag moves blocks on every frame).
+# Saving the project compacts the journal: the whole system is written on the
+# project file (with the next generation) and the journal is started again.
+
+EXTENSION = ".vcgj"
+COMPACT_RECORDS = 2000  # Records that make the journal worth compacting
+
+_LENGTH = struct.Struct("<I")
+
+def journalPath(path):
+    """ Path of the journal of a project file.
+    """
+    return os.path.splitext(path)[0] + EXTENSION
+
+class Journal:
+    def __init__(self,path,projectPath,generation):
+        """ Journal of the changes of a project.
+            Use open to get the journal of an existing project.
+
+        :string path:           Path of the journal file.
+        :string projectPath:    Path of the project file.
+        :int generation:        Generation of the project file.
+        """
+        self.path = path
+        self.projectPath = projectPath
+        self.generation = generation
+        self.system = None
+        self.records = 0        # Records written since the last compaction
+        self.moves = {}         # Moves not written yet {string name: (x,y)}
+        self.file = None
+
+    @classmethod
+    def open(cls,projectPath):
+        """ Journal of a project file. Its records are not replayed yet (see replay).
+        """
+        header = ProjectFile.readHeader(projectPath)
+        return cls(journalPath(projectPath),projectPath,header.get("generation",0))
+
+    def read(self):
+        """ Records of the journal that belong to the current generation of the project.
+        """
+        records = []
+        try:
+            with open(self.path,"rb") as file:
+                while True:
+                    prefix = file.read(_LENGTH.size)
+                    if len(prefix) < _LENGTH.size:
+                        break
+                    length, = _LENGTH.unpack(prefix)
+                    data = file.read(length)
+                    if len(data) < length:
+                        break
+                    try:
+                        records.append(pickle.loads(data))
+                    except Exception:
+                        break
+        except OSError:
+            return []
+
+        # A journal of other generation was already compacted into the project file
+        if len(records) == 0 or records[0] != ("base",self.generation):
+            return []
+        return records[1:]
+
+    def replay(self,system):
+        """ Apply the records of the journal to the system loaded from the project file.
+            Return the amount of records applied.
+        """
+        blocks = dict((block.name,block) for block in system.block)
+        blocks[system.system_input.name] = system.system_input
+        blocks[system.system_output.name] = system.system_output
+
+        records = self.read()
+        for record in records:
+            op = record[0]
+            if op == "add":
+                block = ProjectFile.loads(record[1],system)
+                ProjectFile.restoreBlock(system,block)
+                blocks[block.name] = block
+            elif op == "remove":
+                system.removeBlock(blocks.pop(record[1]))
+            elif op == "rename":
+                block = blocks.pop(record[1])
+                block.setName(record[2])
+                blocks[block.name] = block
+            elif op == "move":
+                blocks[record[1]].screenPos = record[2]
+            elif op == "connect":
+                out,indOutput,inp,indInput = record[1:]
+                system.connect(blocks[out],indOutput,blocks[inp],indInput)
+            elif op == "disconnect":
+                out,indOutput,inp,indInput = record[1:]
+                port = blocks[inp].input_ports[indInput]
+                if port.connection != None:
+                    system.disconnect(port.connection)
+
+        self.records = len(records)
+        return self.records
+
+    def attach(self,system):
+        """ Record the changes of the system from now on.
+            The records are appended to the journal of the current generation.
+        """
+        self.system = system
+        system.journal = self
+        if self.records == 0:
+            self.start()
+        else:
+            self.file = open(self.path,"ab")
+
+    def detach(self):
+        if self.file != None:
+            self.writeMoves()
+        if self.system != None:
+            self.system.journal = None
+            self.system = None
+        self.close()
+
+    def start(self):
+        """ Start the journal of the current generation (it is emptied).
+        """
+        self.close()
+        self.file = open(self.path,"wb")
+        self.records = 0
+        self.moves = {}
+        self.write(("base",self.generation))
+        self.flush()
+
+    def write(self,record):
+        data = pickle.dumps(record,pickle.HIGHEST_PROTOCOL)
+        self.file.write(_LENGTH.pack(len(data)) + data)
+
+    def record(self,op,*args):
+        """ Append a change of the system. It is written on disk on flush.
+        """
+        if self.file == None:
+            return
+        if op == "move":
+            self.moves[args[0].name] = args[1]
+            return
+
+        self.writeMoves()   # Other records may depend on the name of the moved blocks
+        if op == "add":
+            args = (ProjectFile.dumps(args[0],self.system),)
+        elif op == "remove":
+            args = (args[0].name,)
+        elif op in ("connect","disconnect"):
+            conn = args[0]
+            args = (conn.out_block.name,conn.ind_output,conn.in_block.name,conn.ind_input)
+        self.write((op,) + args)
+        self.records += 1
+
+    def writeMoves(self):
+        for name,pos in self.moves.items():
+            self.write(("move",name,pos))
+        self.records += len(self.moves)
+        self.moves = {}
+
+    def flush(self):
+        """ Write the pending records on disk. Its cost depends only on the changes
+            made since the last flush.
+        """
+        if self.file != None:
+            self.writeMoves()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def needsCompaction(self):
+        return self.records >= COMPACT_RECORDS
+
+    def compact(self):
+        """ Write the whole system on the project file & start the journal again.
+        """
+        self.close()
+        ProjectFile.saveSystem(self.system,self.projectPath,self.generation + 1)
+        self.generation += 1
+        self.start()
+
+    def close(self):
+        if self.file != None:
+            self.file.close()
+            self.file = None
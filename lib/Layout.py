@@ -0,0 +1,164 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Layout
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+from collections import deque
+
+import lib.Netlist as Netlist
+
+# Layered layout (Sugiyama style) of the blocks of a system:
+#
+#   1. Layers: each block goes one layer after the blocks that drive it (longest
+#      path). Loops are broken at the first block of the loop that is found.
+#   2. Crossing reduction: blocks of each layer are sorted by the barycenter of
+#      the blocks connected to them, sweeping down & up the layers.
+#   3. Coordinates: layers are columns from left to right, the blocks of each
+#      column are stacked & centered.
+#
+# Edges that span several layers don't get dummy blocks, their barycenters use the
+# relative position of the block on its own layer. It keeps the layout linear on
+# the size of the design.
+
+LAYER_DISTANCE = 120    # Horizontal distance between layers
+BLOCK_DISTANCE = 20     # Vertical space between blocks of the same layer
+PORT_DISTANCE = 10      # Vertical distance between ports (QBlock.DX)
+COLLAPSE_PORTS = 16     # Sides with more ports are drawn with bus pins, until the block is expanded
+BUS_GROUP = 32          # Ports drawn by each bus pin
+
+# Pins of a block on the screen. They are drawn by QBlock with the same rules,
+# a wide block is expanded on the interface (see QBlock.expandedBlocks)
+
+def isCollapsed(count,expanded = False):
+    """ True if a side of a block with count ports is drawn with bus pins.
+    """
+    return count > COLLAPSE_PORTS and not expanded
+
+def slotCount(count,expanded = False):
+    """ Amount of pins drawn on a side of a block with count ports.
+    """
+    if isCollapsed(count,expanded):
+        return (count + BUS_GROUP - 1)//BUS_GROUP
+    return count
+
+def slotOf(count,index,expanded = False):
+    """ Pin (position on its side) that draws the port index of a side with count ports.
+    """
+    return index//BUS_GROUP if isCollapsed(count,expanded) else index
+
+def blockHeight(block,expanded = False):
+    """ Height of a block on the screen.
+    """
+    return PORT_DISTANCE*(max(slotCount(len(block.input_ports),expanded),slotCount(len(block.output_ports),expanded)) + 1)
+
+def assignLayers(netlist,predecessors,successors):
+    """ Layer of each block of the netlist. The system input is on the first layer
+        & the system output on the last one.
+    """
+    total = len(netlist)
+    pending = [len(i) for i in predecessors]
+    layer = [1]*total
+    layer[Netlist.SYSTEM_INPUT] = 0
+    placed = [False]*total
+    placed[Netlist.SYSTEM_OUTPUT] = True    # It goes after everything else
+
+    ready = deque(b for b in range(total) if pending[b] == 0 and not placed[b])
+    scan = 0    # Next block to check when a loop must be broken
+    done = 1
+    while done < total:
+        if len(ready) == 0:
+            # Every block left is on a loop (or driven by one)
+            while placed[scan]:
+                scan += 1
+            ready.append(scan)
+            pending[scan] = 0
+
+        b = ready.popleft()
+        if placed[b]:
+            continue
+        placed[b] = True
+        done += 1
+        for s in successors[b]:
+            if not placed[s]:
+                if layer[s] < layer[b] + 1:
+                    layer[s] = layer[b] + 1
+                pending[s] -= 1
+                if pending[s] == 0:
+                    ready.append(s)
+
+    last = max(layer[b] for b in range(total) if b != Netlist.SYSTEM_OUTPUT) if total > 2 else 0
+    layer[Netlist.SYSTEM_OUTPUT] = last + 1
+    return layer
+
+def reduceCrossings(layers,predecessors,successors,iterations):
+    """ Sort the blocks of each layer to reduce the crossings between connections.
+    """
+    position = [0.0]*len(predecessors)  # Relative position of each block on its layer (0..1)
+
+    def place(blocks):
+        size = len(blocks)
+        for ind,b in enumerate(blocks):
+            position[b] = (ind + 0.5)/size
+
+    for blocks in layers:
+        place(blocks)
+
+    def sweep(order,neighbors):
+        for L in order:
+            blocks = layers[L]
+            keys = {}
+            for b in blocks:
+                near = neighbors[b]
+                keys[b] = sum(position[i] for i in near)/len(near) if len(near) != 0 else position[b]
+            blocks.sort(key = keys.__getitem__)
+            place(blocks)
+
+    down = range(1,len(layers))
+    up = range(len(layers) - 2,-1,-1)
+    for i in range(iterations):
+        sweep(down,predecessors)
+        sweep(up,successors)
+
+def layout(system,iterations = 4,expanded = ()):
+    """ Place the blocks of the system (system input & output included) with a layered layout.
+        The position of each block is written on its screenPos.
+
+    :System system:     System to be placed.
+    :int iterations:    Amount of sweeps (down & up) to reduce crossings.
+    :set expanded:      Wide blocks drawn with a pin for each port.
+    """
+    netlist = system.netlist()
+    total = len(netlist)
+
+    # Graph of blocks, each pair of blocks is linked once
+    predecessors = [set() for b in range(total)]
+    successors = [set() for b in range(total)]
+    for p in range(len(netlist.portBlock)):
+        d = netlist.driver[p]
+        if d != -1:
+            a = netlist.portBlock[d]
+            b = netlist.portBlock[p]
+            if a != b:
+                predecessors[b].add(a)
+                successors[a].add(b)
+    predecessors = [list(i) for i in predecessors]
+    successors = [list(i) for i in successors]
+
+    layer = assignLayers(netlist,predecessors,successors)
+    layers = [[] for i in range(max(layer) + 1)]
+    for b in range(total):
+        layers[layer[b]].append(b)
+
+    reduceCrossings(layers,predecessors,successors,iterations)
+
+    # Coordinates
+    for L,blocks in enumerate(layers):
+        heights = [blockHeight(netlist.blocks[b],netlist.blocks[b] in expanded) for b in blocks]
+        y = -(sum(heights) + BLOCK_DISTANCE*(len(blocks) - 1))/2
+        for b,height in zip(blocks,heights):
+            system.moveBlock(netlist.blocks[b],(L*LAYER_DISTANCE,y))
+            y += height + BLOCK_DISTANCE
@@ -0,0 +1,162 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Netlist
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+from array import array
+
+IN = 1
+OUT = 0
+
+SYSTEM_INPUT = 0    # Id of the block with the inputs of the system
+SYSTEM_OUTPUT = 1   # Id of the block with the outputs of the system
+
+class Netlist:
+    def __init__(self,system):
+        """ Index of the graph of a system in arrays (struct of arrays), for the
+            analyses that walk the whole graph (validation, simulation, layout).
+            It is built from the blocks & connections of the system, that are still
+            the model of the system (code generation reads them), so it is an
+            additional structure: build it when it is needed & drop it after.
+            Blocks & ports are identified by integers:
+
+            Block b:  self.blocks[b]. 0 is the system input, 1 the system output,
+                      the rest are the blocks of the system in the same order.
+            Ports of b: ids portStart[b] ... portStart[b+1]-1, inputs first.
+                      inputCount[b] is the amount of input ports.
+            Port p:   portBlock[p], portIndex[p] (index on its block), portWidth[p],
+                      portMode[p] (IN/OUT)
+            driver[p]:  Output port that drives the input port p (-1 if it is not
+                        connected or p is an output port)
+            Fan-out of the output port p (CSR): fanout[fanoutStart[p]:fanoutStart[p+1]]
+
+        :System system:     System to be compiled.
+        """
+        self.name = system.name
+        self.blocks = [system.system_input,system.system_output] + list(system.block)
+        self.blockId = dict((id(block),b) for b,block in enumerate(self.blocks))
+
+        totalBlocks = len(self.blocks)
+        self.portStart = array('l',[0])*(totalBlocks + 1)
+        self.inputCount = array('l',[0])*totalBlocks
+        self.portBlock = array('l')
+        self.portIndex = array('l')
+        self.portWidth = array('l')
+        self.portMode = array('b')
+
+        # Ports
+        for b,block in enumerate(self.blocks):
+            self.portStart[b] = len(self.portBlock)
+            self.inputCount[b] = len(block.input_ports)
+            for mode,ports in ((IN,block.input_ports),(OUT,block.output_ports)):
+                for ind,port in enumerate(ports):
+                    self.portBlock.append(b)
+                    self.portIndex.append(ind)
+                    self.portWidth.append(port.size)
+                    self.portMode.append(mode)
+        self.portStart[totalBlocks] = len(self.portBlock)
+
+        # Drivers
+        totalPorts = len(self.portBlock)
+        self.driver = array('l',[-1])*totalPorts
+        fanoutCount = array('l',[0])*(totalPorts + 1)
+        for b,block in enumerate(self.blocks):
+            start = self.portStart[b]
+            for ind,port in enumerate(block.input_ports):
+                conn = port.connection
+                if conn != None:
+                    d = self.outputPort(self.blockId[id(system.view(conn.out_block))],conn.ind_output)
+                    self.driver[start + ind] = d
+                    fanoutCount[d + 1] += 1
+
+        # Fan-out (CSR), built with a counting sort over the drivers
+        for p in range(totalPorts):
+            fanoutCount[p + 1] += fanoutCount[p]
+        self.fanoutStart = fanoutCount
+        self.fanout = array('l',[0])*fanoutCount[totalPorts]
+        fill = array('l',fanoutCount[:totalPorts])
+        for p in range(totalPorts):
+            d = self.driver[p]
+            if d != -1:
+                self.fanout[fill[d]] = p
+                fill[d] += 1
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def inputPort(self,b,ind):
+        """ Id of the input port ind of the block b
+        """
+        return self.portStart[b] + ind
+
+    def outputPort(self,b,ind):
+        """ Id of the output port ind of the block b
+        """
+        return self.portStart[b] + self.inputCount[b] + ind
+
+    def inputPorts(self,b):
+        return range(self.portStart[b],self.portStart[b] + self.inputCount[b])
+
+    def outputPorts(self,b):
+        return range(self.portStart[b] + self.inputCount[b],self.portStart[b + 1])
+
+    def getPort(self,p):
+        """ Abstract port with the given id
+        """
+        block = self.blocks[self.portBlock[p]]
+        if self.portMode[p] == IN:
+            return block.input_ports[self.portIndex[p]]
+        return block.output_ports[self.portIndex[p]]
+
+    def portName(self,p):
+        return "%s.%s"%(self.blocks[self.portBlock[p]].name,self.getPort(p).name)
+
+    def getFanout(self,p):
+        """ Input ports driven by the output port p
+        """
+        return self.fanout[self.fanoutStart[p]:self.fanoutStart[p + 1]]
+
+    def validate(self):
+        """ Check the netlist. Return a list with the description of each problem found.
+        """
+        problems = []
+        for p in range(len(self.portBlock)):
+            if self.portMode[p] != IN:
+                continue
+            d = self.driver[p]
+            if d == -1:
+                problems.append("Input %s is not connected"%self.portName(p))
+            elif self.portWidth[d] != self.portWidth[p]:
+                problems.append("Size of %s (%d) doesn't match with %s (%d)"%(self.portName(p),self.portWidth[p],self.portName(d),self.portWidth[d]))
+        return problems
+
+    def topologicalOrder(self):
+        """ Blocks of the system (system input & output excluded) sorted so every block
+            comes after the blocks that drive it. Return None if there is a loop.
+        """
+        totalBlocks = len(self.blocks)
+        pending = array('l',[0])*totalBlocks
+        for p in range(len(self.portBlock)):
+            d = self.driver[p]
+            if d != -1 and self.portBlock[d] != SYSTEM_INPUT:
+                pending[self.portBlock[p]] += 1
+
+        ready = [b for b in range(2,totalBlocks) if pending[b] == 0]
+        order = array('l')
+        while ready:
+            b = ready.pop()
+            order.append(b)
+            for p in self.outputPorts(b):
+                for q in self.getFanout(p):
+                    user = self.portBlock[q]
+                    pending[user] -= 1
+                    if pending[user] == 0 and user != SYSTEM_OUTPUT:
+                        ready.append(user)
+
+        if len(order) != totalBlocks - 2:
+            return None
+        return order
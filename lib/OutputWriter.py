@@ -0,0 +1,81 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Output Writer
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import hashlib
+
+BUFFER = 1024*1024
+
+def fileHash(path):
+    """ Hash (sha256) of the content of a file, None if it doesn't exist.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path,"rb") as file:
+            while True:
+                data = file.read(BUFFER)
+                if not data:
+                    break
+                digest.update(data)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+class OutputWriter:
+    def __init__(self,path,encoding = "utf-8"):
+        """ Text stream that writes a generated file only if its content changed.
+            Text is written to a temporal file while it is hashed. On close, the
+            temporal file replaces the old one only if the hashes are different,
+            so unchanged files keep their modification time.
+
+            with OutputWriter(path) as stream:
+                system.emitVHDL(stream)
+            stream.changed  -> True if the file was written
+
+        :string path:       Path of the output file.
+        :string encoding:   Encoding of the text.
+        """
+        self.path = path
+        self.encoding = encoding
+        self.temp = "%s.%d.tmp"%(path,os.getpid())
+        self.file = open(self.temp,"wb")
+        self.digest = hashlib.sha256()
+        self.changed = None
+
+    def write(self,text):
+        data = text.encode(self.encoding)
+        self.digest.update(data)
+        self.file.write(data)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.close()
+        if fileHash(self.path) == self.digest.hexdigest():
+            os.remove(self.temp)
+            self.changed = False
+        else:
+            os.replace(self.temp,self.path)
+            self.changed = True
+
+    def discard(self):
+        """ Forget everything written, the old file is kept.
+        """
+        self.file.close()
+        os.remove(self.temp)
+        self.changed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,excType,excValue,traceback):
+        if excType == None:
+            self.close()
+        else:
+            self.discard()
@@ -0,0 +1,66 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Parallel
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import collections
+import concurrent.futures
+
+CHUNK = 32      # Maximum amount of blocks sent to a worker on each task
+WINDOW = 4      # Tasks waiting or running for each worker
+
+_store = None   # Fragment store of the worker process
+
+def _initialize(store):
+    global _store
+    _store = store
+
+def _render(blocks,store = None):
+    from lib.System import System
+    store = store if store != None else _store
+    return [(System.declarationCode(block),System.implementationCode(block,store)) for block in blocks]
+
+def renderBlocks(blocks,jobs,mode = "process",store = None):
+    """ Render the declaration & implementation code of the blocks using a pool of workers.
+        Return a list of (declaration,implementation) in the same order of blocks.
+        See iterRenderBlocks for the arguments.
+    """
+    return list(iterRenderBlocks(blocks,jobs,mode,store))
+
+def iterRenderBlocks(blocks,jobs,mode = "process",store = None):
+    """ Generator of the (declaration,implementation) code of the blocks, in the same
+        order of blocks. Blocks are sent to the workers in chunks, and only WINDOW chunks
+        for each worker are sent before their results are given, so the code of all
+        blocks is not kept in memory.
+
+    :Block[] blocks:        Blocks to be rendered. With processes they must be detached (see Block.detached)
+    :int jobs:              Amount of workers.
+    :string mode:           "process" or "thread"
+    :FragmentStore store:   Disk cache of the code of the blocks (optional)
+    """
+    chunk = max(1,min(CHUNK,len(blocks)//(jobs*WINDOW)))
+
+    if mode == "thread":
+        executor = concurrent.futures.ThreadPoolExecutor(jobs)
+        args = (store,)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(jobs,initializer = _initialize,initargs = (store,))
+        args = ()   # The store is given to each worker once (see _initialize)
+
+    with executor:
+        pending = collections.deque()
+        try:
+            for first in range(0,len(blocks),chunk):
+                if len(pending) == jobs*WINDOW:
+                    yield from pending.popleft().result()
+                pending.append(executor.submit(_render,blocks[first:first + chunk],*args))
+            while len(pending) != 0:
+                yield from pending.popleft().result()
+        finally:
+            # The generator was closed before the end
+            for future in pending:
+                future.cancel()
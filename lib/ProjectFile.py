@@ -0,0 +1,238 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Project File
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import io
+import os
+import pickle
+import struct
+
+# This module doesn't use Qt, so projects can be read & written without the GUI.
+#
+# Binary project format (.vcgp):
+#
+#   MAGIC | version (uint16) | section table | sections
+#
+# The section table has the offset & length (uint64) of each section, in the
+# order of SECTIONS. Each section is an independent pickle:
+#
+#   header:         {name, input_info, output_info, blocks (amount), generation}
+#   blocks:         List of blocks, without connections
+#   connections:    List of (out block, out port, in block, in port)
+#   layout:         Position of each block on the screen
+#
+# Blocks are referenced by their position on the block list of the system,
+# SYSTEM_INPUT & SYSTEM_OUTPUT refer to the ports of the system.
+# Files that don't start with MAGIC are whole pickled systems (old format).
+#
+# generation is increased each time the file is written, the journal of the
+# project (see lib/Journal.py) is only replayed over the generation it was
+# started on.
+
+MAGIC = b"VCGP"
+VERSION = 1
+SECTIONS = ("header","blocks","connections","layout")
+
+SYSTEM_INPUT = -1
+SYSTEM_OUTPUT = -2
+
+_PREFIX = struct.Struct("<4sH")
+_ENTRY = struct.Struct("<QQ")
+_TABLE_SIZE = _ENTRY.size*len(SECTIONS)
+
+class InvalidProjectFile(pickle.UnpicklingError):
+    pass
+
+class ProjectFile:
+    def __init__(self,path):
+        """ Project file opened for reading.
+            Only the header is read, each section is read when it is needed.
+
+        :string path:   Path of the project file.
+        """
+        self.path = path
+        self.legacy = False     # True for old files (whole pickled system)
+        self.table = {}         # {string section: (int offset, int length)}
+
+        with open(path,"rb") as file:
+            prefix = file.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size or prefix[:4] != MAGIC:
+                self.legacy = True
+            else:
+                magic,version = _PREFIX.unpack(prefix)
+                if version > VERSION:
+                    raise InvalidProjectFile("Unknown project format version %d"%version)
+                table = file.read(_TABLE_SIZE)
+                if len(table) != _TABLE_SIZE:
+                    raise InvalidProjectFile("Truncated project file")
+                for i,name in enumerate(SECTIONS):
+                    self.table[name] = _ENTRY.unpack_from(table,i*_ENTRY.size)
+
+        if self.legacy:
+            self.system = loadLegacy(path)
+            self.header = headerOf(self.system)
+        else:
+            self.system = None
+            self.header = self.readSection("header")
+
+    def readSection(self,name,system = None):
+        offset,length = self.table[name]
+        with open(self.path,"rb") as file:
+            file.seek(offset)
+            data = file.read(length)
+        if len(data) != length:
+            raise InvalidProjectFile("Truncated section %s"%name)
+        return loads(data,system)
+
+    def loadSystem(self,layout = True):
+        """ Build the system saved on the file.
+
+        :bool layout:   Load the position of the blocks too.
+        """
+        if self.legacy:
+            return self.system
+
+        from lib.System import System
+        header = self.header
+        system = System(header["name"],header["input_info"],header["output_info"])
+
+        for block in self.readSection("blocks",system):
+            restoreBlock(system,block)
+
+        def getBlock(ind):
+            if ind == SYSTEM_INPUT:
+                return system.system_input
+            if ind == SYSTEM_OUTPUT:
+                return system.system_output
+            return system.block[ind]
+
+        for outBlock,indOutput,inBlock,indInput in self.readSection("connections"):
+            system.connect(getBlock(outBlock),indOutput,getBlock(inBlock),indInput)
+
+        if layout:
+            self.applyLayout(system)
+        return system
+
+    def applyLayout(self,system):
+        """ Set the position of the blocks of the system (it must be the one on this file).
+        """
+        if self.legacy:
+            return
+        inputPos,outputPos,positions = self.readSection("layout")
+        system.system_input.screenPos = inputPos
+        system.system_output.screenPos = outputPos
+        for block,pos in zip(system.block,positions):
+            block.screenPos = pos
+
+class _SectionPickler(pickle.Pickler):
+    def __init__(self,file,system):
+        super().__init__(file,pickle.HIGHEST_PROTOCOL)
+        self.system = system
+        self.origin = getattr(system,"origin",system)  # Unmodified blocks of a snapshot are on its system
+
+    def persistent_id(self,obj):
+        # The system & connections are saved on their own sections
+        from lib.Connection import Connection
+        if obj is self.system or obj is self.origin:
+            return "system"
+        if isinstance(obj,Connection):
+            return "connection"
+        return None
+
+class _SectionUnpickler(pickle.Unpickler):
+    def __init__(self,file,system):
+        super().__init__(file)
+        self.system = system
+
+    def persistent_load(self,pid):
+        if pid == "system":
+            return self.system
+        return None
+
+def dumps(value,system):
+    """ Pickle a value that references the system & its connections.
+        The system is saved as a reference and the connections as None.
+    """
+    data = io.BytesIO()
+    _SectionPickler(data,system).dump(value)
+    return data.getvalue()
+
+def loads(data,system):
+    """ Unpickle a value saved with dumps, the references point to system.
+    """
+    return _SectionUnpickler(io.BytesIO(data),system).load()
+
+def restoreBlock(system,block):
+    """ Add to the system a block read with loads. It is added without connections.
+    """
+    for port in block.input_ports:
+        port.connection = None
+    for port in block.output_ports:
+        port.connection = []
+    block.system = system
+    name = block.name
+    block.name = None
+    block.setName(name)
+    system.addBlock(block)
+
+def headerOf(system,generation = 0):
+    return {"name":system.name,
+            "input_info":list(system.input_info),
+            "output_info":list(system.output_info),
+            "blocks":len(system.block),
+            "generation":generation}
+
+def loadLegacy(path):
+    with open(path,"rb") as file:
+        return pickle.load(file)
+
+def readHeader(path):
+    """ Read only the header of a project file: {name, input_info, output_info, blocks}
+    """
+    return ProjectFile(path).header
+
+def loadSystem(path):
+    """ Load the abstract system saved on a project file (.vcgp)
+
+    :string path:   Path of the project file.
+    """
+    return ProjectFile(path).loadSystem()
+
+def saveSystem(system,path,generation = 0):
+    """ Save the abstract system on a project file (.vcgp)
+        The file is replaced at once, a crash never leaves it half written.
+
+    :System system:     System to be saved.
+    :string path:       Path of the project file.
+    :int generation:    Generation of the file (see lib/Journal.py)
+    """
+    index = dict((id(block),i) for i,block in enumerate(system.block))
+    index[id(system.system_input)] = SYSTEM_INPUT
+    index[id(system.system_output)] = SYSTEM_OUTPUT
+
+    connections = []
+    for block in [system.system_output] + list(system.block):
+        for ind,port in enumerate(block.input_ports):
+            conn = port.connection
+            if conn != None:
+                connections.append((index[id(system.view(conn.out_block))],conn.ind_output,index[id(block)],ind))
+
+    layout = (system.system_input.screenPos,system.system_output.screenPos,[block.screenPos for block in system.block])
+
+    sections = [dumps(value,system) for value in (headerOf(system,generation),list(system.block),connections,layout)]
+
+    temp = path + ".tmp"
+    with open(temp,"wb") as file:
+        file.write(_PREFIX.pack(MAGIC,VERSION))
+        offset = _PREFIX.size + _TABLE_SIZE
+        for data in sections:
+            file.write(_ENTRY.pack(offset,len(data)))
+            offset += len(data)
+        for data in sections:
+            file.write(data)
+    os.replace(temp,path)
@@ -8,46 +8,57 @@
 __author__ = "BlakeTeam"
 
 import os.path
-import pickle
 
 from data import *
 from visual.ViewVisual import *
 
 
 from .System import System as _System
+from . import ProjectFile
+from . import Journal
+from . import Layout
 from visual.SystemVisual import QSystem
 
 import visual.BlockVisual
+import visual.SceneVirtualizer
+import data.constants
 
 class GraphicsScene(QGraphicsScene):
     def __init__(self):
         super().__init__()
 
 class IProject:
-    def __init__(self,path,input_vector,output_vector,mainWindow = None):
+    def __init__(self,path,input_vector,output_vector,mainWindow = None,system = None):
         """ Interface to handle each project.
 
         :string path:           Directory (name included of the current project)
         :Int[] input_vector:    List with the size of the input ports of the system
         :Int[] output_vector:   List with the size of the output ports of the system
+        :System system:         System of the project if it was already loaded
         """
         self.dir, self.name = os.path.split(path)
         realName = self.name.split('.')[0]  # The name of the project without the extension
-        self.system = _System(realName,input_vector,output_vector)
+        self.system = system if system != None else _System(realName,input_vector,output_vector)
         self.scene = GraphicsScene()
         self.view = QView(self)
         self.view.setScene(self.scene)
         self.initializeView(self.view)
 
         self.mainWindow = mainWindow
+        self.journal = None     # Journal with the changes since the last save (see lib/Journal.py)
 
     @classmethod
     def load(cls,path):
-        dir, name = os.path.split(path)
-        file = open(dir + "\\" + name,"rb")
-        system = pickle.load(file)
-        file.close()
-        return IProject(path,system.input_info,system.output_info)
+        """ Load a project. The changes on its journal (not saved when the application
+            was closed) are applied.
+        """
+        system = ProjectFile.loadSystem(path)
+        journal = Journal.Journal.open(path)
+        journal.replay(system)
+        project = IProject(path,system.input_info,system.output_info,system = system)
+        project.journal = journal
+        journal.attach(system)
+        return project
 
     def save(self):
         # Saving file
@@ -57,25 +68,68 @@ class IProject:
         except:pass
         try:os.mkdir(vhdlDir+"\\"+proj)
         except:pass
-        f = open(self.dir + "\\" + self.name,"wb")
-        pickle.dump(self.system,f)
-        f.close()
+
+        path = self.dir + "\\" + self.name
+        if self.journal == None:
+            ProjectFile.saveSystem(self.system,path)
+            self.journal = Journal.Journal(Journal.journalPath(path),path,0)
+            self.journal.attach(self.system)
+        else:
+            self.journal.compact()
+
+    def autosave(self):
+        """ Write the changes made since the last autosave on the journal.
+            The whole project is saved only when the journal is too long.
+        """
+        if self.journal == None:
+            return
+        self.journal.flush()
+        if self.journal.needsCompaction():
+            self.journal.compact()
+
+    def autoLayout(self):
+        """ Place all the blocks of the project with the layered layout (see lib/Layout.py)
+        """
+        Layout.layout(self.system,expanded = visual.BlockVisual.QBlock.expandedBlocks)
+        self.view.connectionBundle.invalidate()
+        if self.view.virtualizer != None:
+            self.view.virtualizer.reset()
+            return
+        for item in self.scene.items():
+            if isinstance(item,QBlock):
+                item.setPos(*item.block.screenPos)
 
     def initializeView(self,view):
         """ Initialize all QGraphicsView components.
+            Big projects use a virtualized scene (see SceneVirtualizer).
         """
+        if len(self.system.block) > data.constants.VIRTUAL_SCENE_BLOCKS:
+            view.virtualizer = visual.SceneVirtualizer.SceneVirtualizer(view,self.system)
+
         inp = visual.BlockVisual.ExternalBlock(self.system.system_input,view)
         out = visual.BlockVisual.ExternalBlock(self.system.system_output,view)
 
         self.scene.addItem(inp)
         self.scene.addItem(out)
+        self.scene.addItem(view.connectionBundle)
 
         # self.visualSystem = QSystem(self.system)
         # self.scene.addItem(self.visualSystem)
 
+        if view.virtualizer != None:
+            # Items are created when the view is shown or scrolled
+            self.scene.addItem(view.virtualizer.overview)
+            view.virtualizer.schedule()
+            return
+
         # Loading blocks
         for b in self.system.block:
             self.scene.addItem(QBlock(b, view))
 
-        # TODO: Load Connections
         # Loading Connections
+        for conn in list(self.system.connections):
+            inputPin = conn.in_block.input_ports[conn.ind_input].pin
+            outputPin = conn.out_block.output_ports[conn.ind_output].pin
+            visualConnection = QView.paintConnection(inputPin,outputPin,ConnectionLine())
+            self.scene.addItem(visualConnection)
+            self.system.connections[conn] = visualConnection
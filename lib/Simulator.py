@@ -0,0 +1,170 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Simulator
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import numpy
+
+import lib.Netlist as Netlist
+
+WORD = 64   # Vectors packed on each word
+
+# Values are simulated bit-parallel: a signal of size s is an array of s rows
+# of packed words (uint64). Bit j of word w on row k is the bit k of the signal
+# on the vector 64*w + j. Every block is evaluated once for all the vectors.
+#
+# Blocks are simulated through their evaluate method:
+#
+#   def evaluate(self,inputs):
+#       return [outputs]
+#
+# inputs is the list of packed values of the input ports & it returns the list
+# of packed values of the output ports. Bitwise operators (& | ^ ~) and slicing
+# of rows are enough for most blocks.
+
+class InvalidSimulation(BaseException):
+    pass
+
+def words(count):
+    """ Amount of words needed to pack count vectors.
+    """
+    return (count + WORD - 1)//WORD
+
+def pack(values,size):
+    """ Pack the value of a signal on each vector.
+
+    :int[] values:  Value of the signal on each vector.
+    :int size:      Size of the signal in bits.
+    """
+    count = len(values)
+    if size > WORD:
+        values = numpy.asarray(values,dtype = object)
+    else:
+        values = numpy.asarray(values,dtype = numpy.uint64)
+
+    packed = numpy.zeros((size,words(count)),dtype = numpy.uint64)
+    raw = packed.view(numpy.uint8).reshape(size,-1)
+    for k in range(size):
+        bits = ((values >> k) & 1).astype(numpy.bool_)
+        row = numpy.packbits(bits,bitorder = "little")
+        raw[k,:len(row)] = row
+    return packed
+
+def unpack(packed,size,count):
+    """ Value of a packed signal on each vector.
+        Signals of more than 64 bits are returned as python integers.
+
+    :array packed:  Packed signal (size x words).
+    :int size:      Size of the signal in bits.
+    :int count:     Amount of vectors.
+    """
+    values = numpy.zeros(count,dtype = object if size > WORD else numpy.uint64)
+    raw = numpy.ascontiguousarray(packed).view(numpy.uint8).reshape(size,-1)
+    for k in range(size):
+        bits = numpy.unpackbits(raw[k],bitorder = "little")[:count]
+        if size > WORD:
+            values += bits.astype(object) << k
+        else:
+            values |= bits.astype(numpy.uint64) << numpy.uint64(k)
+    return values
+
+def randomPacked(size,count,generator = None):
+    """ Packed signal with random values, without building each value.
+    """
+    generator = generator if generator != None else numpy.random.default_rng()
+    return generator.integers(0,2**WORD,size = (size,words(count)),dtype = numpy.uint64,endpoint = False)
+
+class Simulator:
+    def __init__(self,system):
+        """ Compile a system into a netlist that can be simulated (see lib/Netlist.py)
+            Every output port of the system is a net. Blocks are evaluated in
+            topological order, each one reading the nets that drive its inputs.
+
+        :System system:     System to be simulated.
+        """
+        self.system = system
+        self.compile()
+
+    def compile(self):
+        netlist = self.system.netlist()
+        self.netlist = netlist
+
+        problems = netlist.validate()
+        if len(problems) != 0:
+            raise InvalidSimulation(problems[0])
+
+        order = netlist.topologicalOrder()
+        if order == None:
+            raise InvalidSimulation("The system has combinational loops")
+
+        # Nets are identified by the id of the output port that drives them.
+        # Input & output nets of each block, in evaluation order.
+        driver = numpy.frombuffer(netlist.driver,dtype = numpy.dtype(netlist.driver.typecode))
+        self.order = []
+        self.inputNets = []
+        self.outputNets = []
+        for b in order:
+            block = netlist.blocks[b]
+            if not hasattr(block,"evaluate"):
+                raise InvalidSimulation("Block %s can't be simulated (no evaluate method)"%block.name)
+            inputs = netlist.inputPorts(b)
+            outputs = netlist.outputPorts(b)
+            self.order.append(block)
+            self.inputNets.append(driver[inputs.start:inputs.stop].astype(numpy.intp))
+            self.outputNets.append(numpy.arange(outputs.start,outputs.stop,dtype = numpy.intp))
+
+        self.totalNets = len(netlist.portBlock)
+        self.systemInputNets = list(netlist.outputPorts(Netlist.SYSTEM_INPUT))
+        self.systemOutputNets = [netlist.driver[p] for p in netlist.inputPorts(Netlist.SYSTEM_OUTPUT)]
+
+    def runPacked(self,inputs):
+        """ Simulate packed vectors.
+            Return a dictionary with the packed value of each output of the system.
+
+        :dict inputs:   {string name: packed array} with every input of the system.
+        """
+        system = self.system
+        nets = [None]*self.totalNets
+        for ind,port in enumerate(system.system_input.output_ports):
+            value = inputs[port.name]
+            if value.shape[0] != port.size:
+                raise InvalidSimulation("Input %s has %d bits, %d given"%(port.name,port.size,value.shape[0]))
+            nets[self.systemInputNets[ind]] = value
+
+        for block,inputNets,outputNets in zip(self.order,self.inputNets,self.outputNets):
+            outputs = block.evaluate([nets[i] for i in inputNets])
+            for net,value in zip(outputNets,outputs):
+                nets[net] = value
+
+        return dict((port.name,nets[net]) for port,net in zip(system.system_output.input_ports,self.systemOutputNets))
+
+    def run(self,inputs):
+        """ Simulate a set of vectors.
+            Return a dictionary with the value of each output of the system on each vector.
+
+        :dict inputs:   {string name: int[] values} with every input of the system.
+        """
+        count = None
+        packed = {}
+        for port in self.system.system_input.output_ports:
+            values = inputs[port.name]
+            if count == None:
+                count = len(values)
+            elif count != len(values):
+                raise InvalidSimulation("All inputs must have the same amount of vectors")
+            packed[port.name] = pack(values,port.size)
+
+        outputs = self.runPacked(packed)
+        return dict((port.name,unpack(outputs[port.name],port.size,count or 0)) for port in self.system.system_output.input_ports)
+
+    def runRandom(self,count,seed = None):
+        """ Simulate count random vectors.
+            Return the packed inputs & outputs: (inputs,outputs)
+        """
+        generator = numpy.random.default_rng(seed)
+        inputs = dict((port.name,randomPacked(port.size,count,generator)) for port in self.system.system_input.output_ports)
+        return inputs,self.runPacked(inputs)
@@ -0,0 +1,147 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Startup Trace
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+# Time spent on each import & each initialization phase while the application
+# starts. It is enabled with the --trace-startup option (or the VCG_TRACE_STARTUP
+# environment variable) and the report is printed on stderr when the main
+# window is shown:
+#
+#   python main.py --trace-startup
+#
+# This module only uses the standard library: main.py imports it before
+# anything else, so PyQt4 & the modules of the application are traced too.
+
+import sys
+import os
+import time
+import builtins
+import functools
+import importlib.util
+
+OPTION = "--trace-startup"
+ENVIRONMENT = "VCG_TRACE_STARTUP"
+TOP_IMPORTS = 25    # Imports listed on the report (the slowest ones)
+
+_start = time.perf_counter()
+_enabled = False
+_imports = {}       # First import of each module {string name: [float total, float self]}
+_stack = []         # Imports in progress [[string name, float start, float children]]
+_phases = []        # Initialization phases [(string name, int depth, float time)]
+_depth = 0
+_import = builtins.__import__
+
+def enabled():
+    return _enabled
+
+def enable(argv = None):
+    """ Start tracing if it was asked on the command line or on the environment.
+        The option is removed from argv. Return True if the trace is enabled.
+    """
+    global _enabled
+    argv = sys.argv if argv == None else argv
+    if OPTION in argv:
+        argv.remove(OPTION)
+        _enabled = True
+    elif os.getenv(ENVIRONMENT):
+        _enabled = True
+
+    if _enabled:
+        builtins.__import__ = _tracedImport
+    return _enabled
+
+def _tracedImport(name, globals = None, locals = None, fromlist = (), level = 0):
+    # Only the first import of a module is measured, later ones are lookups on sys.modules
+    if level != 0 and globals != None and globals.get("__package__"):
+        full = importlib.util.resolve_name("."*level + name,globals["__package__"])
+    else:
+        full = name
+    if full in sys.modules:
+        return _import(name,globals,locals,fromlist,level)
+
+    _stack.append([full,time.perf_counter(),0.0])
+    try:
+        return _import(name,globals,locals,fromlist,level)
+    finally:
+        name,start,children = _stack.pop()
+        total = time.perf_counter() - start
+        _imports[name] = [total,total - children]
+        if len(_stack) != 0:
+            _stack[-1][2] += total
+
+class phase:
+    def __init__(self, name):
+        """ Context manager that measures a phase of the initialization.
+            It does nothing if the trace is not enabled.
+
+        :string name:   Name of the phase on the report.
+        """
+        self.name = name
+
+    def __enter__(self):
+        global _depth
+        self.start = time.perf_counter()
+        _depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        global _depth
+        _depth -= 1
+        if _enabled:
+            _phases.append((self.name,_depth,time.perf_counter() - self.start))
+        return False
+
+def instrument(cls, *names):
+    """ Measure the methods of a class as phases (named Class.method).
+        The class is not changed if the trace is not enabled.
+    """
+    if not _enabled:
+        return
+    for name in names:
+        method = getattr(cls,name)
+
+        def traced(*args, _method = method, _name = cls.__name__ + "." + name, **kwargs):
+            with phase(_name):
+                return _method(*args,**kwargs)
+
+        functools.update_wrapper(traced,method)
+        setattr(cls,name,traced)
+
+def report(file = None):
+    """ Print the phases and the slowest imports since the application was started.
+        Imports done from now on are not traced.
+    """
+    if not _enabled:
+        return
+    builtins.__import__ = _import
+    file = sys.stderr if file == None else file
+    elapsed = time.perf_counter() - _start
+
+    print("Startup: %.0f ms"%(elapsed*1000),file = file)
+
+    print("\nPhases (ms):",file = file)
+    # Phases are saved when they end, inner phases are listed after their parent
+    order = []
+    pending = []
+    for name,depth,spent in _phases:
+        children = [i for i in pending if i[1] > depth]
+        pending = [i for i in pending if i[1] <= depth] + [(name,depth,spent,children)]
+    def listPhases(phases):
+        for name,depth,spent,children in phases:
+            order.append((name,depth,spent))
+            listPhases(children)
+    listPhases(pending)
+    for name,depth,spent in order:
+        print("%9.1f  %s%s"%(spent*1000,"  "*depth,name),file = file)
+
+    print("\nImports (ms, slowest %d of %d):"%(min(TOP_IMPORTS,len(_imports)),len(_imports)),file = file)
+    print("%9s %9s  %s"%("total","self","module"),file = file)
+    slowest = sorted(_imports.items(),key = lambda i: i[1][0],reverse = True)[:TOP_IMPORTS]
+    for name,(total,own) in slowest:
+        print("%9.1f %9.1f  %s"%(total*1000,own*1000,name),file = file)
+    file.flush()
@@ -7,14 +7,25 @@
 
 __author__ = "BlakeTeam"
 
+import copy as _copy
+import threading
+import weakref
+
 import lib.signature
+import lib.Parallel
 from lib import *
 from .Block import Block as _Block
 from lib.Connection import Connection as _Connection
+from lib.Netlist import Netlist as _Netlist
 
 IN = 1
 OUT = 0
 
+def signalType(size):
+    """ VHDL type of a signal of the given size (in bits)
+    """
+    return "std_logic" if size == 1 else "std_logic_vector(%d downto 0)"%(size - 1)
+
 class System:
     def __init__(self,name,input_info,output_info):
         """ Structure that handles an abstract system
@@ -26,14 +37,21 @@ class System:
         self.name = name        # The name of the system
 
         self.block_name = set() # The name of all blocks on the system
+        self.name_counter = {}  # Next suffix to try for each base name <string: int>
         self.conn_name = set()  # The name of all connections on the system
 
         self.block = []         # Block list of the system
         self.connections = {}   # Connection dictionary of the system <Abstract Connection: QGraphicsLineItem>
+        self.fragments = {}     # Generated code of each block <Block: BlockFragment>
+        self.journal = None     # Journal that records the changes of the system (see lib/Journal.py)
+
+        self.lock = threading.RLock()       # Held while the system is modified (see snapshot)
+        self.snapshots = weakref.WeakSet()  # Live snapshots of the system
+        self.shared = False                 # The block list is shared with a snapshot
         self.system_input = _Block((),[size for name,size in input_info],self)
         # Setting names to input ports
         for i in range(len(input_info)):
-            self.system_input.output_ports[i].name = input_info[i][0]
+            self.system_input.setOutputName(input_info[i][0],i)
 
         self.system_input.screenPos = (-50,0)
         self.system_input.setName("SystemInput")
@@ -41,7 +59,7 @@ class System:
 
         # Setting names to input ports
         for i in range(len(output_info)):
-            self.system_output.input_ports[i].name = output_info[i][0]
+            self.system_output.setInputName(output_info[i][0],i)
 
         self.system_output.screenPos = (50,0)
         self.system_output.setName("SystemOutput")
@@ -50,105 +68,345 @@ class System:
         self.output_info = output_info
         self.input_names = [name for name,size in input_info]
         self.output_names = [name for name,size in output_info]
+        self.buildIndex()
         self.includedLibrary = ["ieee.std_logic_1164.all"] #TODO: Revisar esto, hay que modificarlo
 
     def buildVHDLCode(self):
         """ Building the code that will be generated.
+            The whole text is returned as a single string, use emitVHDL to
+            write big systems straight into a file.
+        """
+        return "".join(self.iterVHDLCode())
+
+    def emitVHDL(self,stream,store = None,jobs = 1,mode = "process",deterministic = False,cache = True):
+        """ Write the VHDL code of the system on stream, section by section.
+            The text is never held entirely in memory (unless it is kept on the
+            fragment cache, see cache).
+
+        :TextIO stream:         Any object with a write method (file, StringIO, ...)
+        :FragmentStore store:   Disk cache of the code of the blocks (optional)
+        :int jobs:              Amount of workers rendering the blocks (see prefetch)
+        :string mode:           Workers are "process" or "thread"
+        :bool deterministic:    The same system always produces the same text
+        :bool cache:            Keep the code of each block on the fragment cache, so the next
+                                generation only rebuilds the modified blocks. Without it the
+                                code of each block is dropped once it is written (single pass)
         """
-        fileText = lib.signature.signature()
+        write = stream.write
+        for chunk in self.iterVHDLCode(store,jobs,mode,deterministic,cache):
+            write(chunk)
+
+    def iterVHDLCode(self,store = None,jobs = 1,mode = "process",deterministic = False,cache = True):
+        """ Generator of the VHDL code of the system.
+            It yields the code in chunks, in the same order they appear on the file.
+
+        :FragmentStore store:   Disk cache of the code of the blocks (optional)
+        :int jobs:              Amount of workers rendering the blocks (see prefetch)
+        :string mode:           Workers are "process" or "thread"
+        :bool deterministic:    The same system always produces the same text
+        :bool cache:            Keep the code of each block on the fragment cache (see emitVHDL)
+        """
+        if jobs > 1 and cache:
+            self.prefetch(jobs,mode,store)
 
-        # Including libraries
-        fileText += "-- Including libraries\nLIBRARY ieee;\n"
+        yield lib.signature.signature(deterministic)
 
+        # Including libraries
+        yield "-- Including libraries\nLIBRARY ieee;\n"
         for i in self.includedLibrary:
-            fileText += "USE %s;\n"%i
-
-        fileText += "\n"
-        fileText += "ENTITY %s IS\n"%self.name
+            yield "USE %s;\n"%i
 
-        fileText += "-- Generating ports\n"
-        fileText += "PORT (\n"
+        yield "\n"
+        yield "ENTITY %s IS\n"%self.name
+        yield "-- Generating ports\n"
+        yield "PORT (\n"
 
-        # Generating input ports
-        for i in self.system_input.output_ports:
-            fileText += "%s: IN std_logic%s;\n"%(i.name,"" if i.size == 1 else "_vector(%d downto 0)"%(i.size - 1)) #TODO: Aqui cambie
-
-        # Generating output ports
-        for i in self.system_output.input_ports:
-            fileText += "%s: OUT std_logic%s;\n"%(i.name,"" if i.size == 1 else "_vector(%d downto 0)"%(i.size - 1)) #TODO: Aqui cambie
-
-        fileText = fileText[:-2]
-        fileText += ");\n"
-        fileText += "END %s;\n"%self.name
+        # Generating input & output ports. The last one is not followed by ';'
+        ports = [(i.name,"IN",i.size) for i in self.system_input.output_ports]
+        ports += [(i.name,"OUT",i.size) for i in self.system_output.input_ports]
+        for pos,(name,direction,size) in enumerate(ports):
+            yield "%s: %s %s%s"%(name,direction,signalType(size),";\n" if pos + 1 < len(ports) else "")
+        yield ");\n"
+        yield "END %s;\n"%self.name
 
         # Architecture Implementation
-        fileText += "\n-- Architecture Implementation\n"
-        fileText += "ARCHITECTURE Arq_%s OF %s IS\n"%(self.name,self.name)
-        fileText += "BEGIN\n"
+        yield "\n-- Architecture Implementation\n"
+        yield "ARCHITECTURE Arq_%s OF %s IS\n"%(self.name,self.name)
+        yield "BEGIN\n"
 
         # Port declaration
-        fileText += "-- Port declaration\n"
-
-        # TODO: Overrated RAM
+        yield "-- Port declaration\n"
         for i in self.block:
-
-            signals = i.getSignals()
-            inputSig = []
-            outputSig = []
-            tempSig = []
-            for name,size,mode in signals:
-                if mode == IN:
-                    inputSig.append((name,size))
-                elif mode == OUT:
-                    outputSig.append((name,size))
-                else:
-                    tempSig.append((name,size))
-            fileText += "\n-- Declaring %s's ports%s\n"%(i.name," & temporary signals" if len(tempSig) != 0 else "") #TODO: Aqui cambie y moví la linea de lugar
-
-            fileText += "-- Input ports\n"
-            for name,size in inputSig:
-                fileText += "signal %s__%s: std_logic%s;\n"%(i.name,name,"" if size == 1 else "_vector(%d downto 0)"%(size - 1)) #TODO: Aqui cambie
-
-            fileText += "\n-- Output ports\n"
-            for name,size in outputSig:
-                fileText += "signal %s__%s: std_logic%s;\n"%(i.name,name,"" if size == 1 else "_vector(%d downto 0)"%(size - 1)) #TODO: Aqui cambie
-            if len(tempSig) != 0: #TODO: Aqui cambie
-                fileText += "\n-- Temporary signals\n"
-                for name,size in tempSig:
-                    fileText += "signal %s__%s: std_logic%s;\n"%(i.name,name,"" if size == 1 else "_vector(%d downto 0)"%(size - 1)) #TODO: Aqui cambie
+            yield self.fragment(i,store).declaration if cache else self.declarationCode(i)
 
         # Defining connections
-        fileText += "\n-- Defining connections\n"
-
+        yield "\n-- Defining connections\n"
         for i in self.block:
-            for port_inp in i.input_ports:
-                receiver = i.name + "__" + port_inp.name
-                if self.system_input == port_inp.connection.out_block:
-                    sender = port_inp.connection.out_block.output_ports[port_inp.connection.ind_output].name
-                else:
-                    sender = port_inp.connection.out_block.name + "__" + port_inp.connection.out_block.output_ports[port_inp.connection.ind_output].name
-                fileText += "%s <= %s;\n"%(receiver, sender)
-            fileText += "\n"
+            yield self.fragment(i,store).connection if cache else self.connectionCode(i)
 
         # Block implementations
-        fileText += "\n-- Blocks implementation\n"
-
-        for i in self.block:
-            fileText += "-- Implementation of %s block\n"%i.name
-            fileText += i.generate()
-            fileText += "\n"
+        yield "\n-- Blocks implementation\n"
+        if cache:
+            for i in self.block:
+                yield self.fragment(i,store).implementation
+        elif jobs > 1:
+            # Rendered by the workers & written as soon as each one is ready
+            copies = [i.detached() for i in self.block] if mode == "process" else self.block
+            for declaration,implementation in lib.Parallel.iterRenderBlocks(copies,jobs,mode,store):
+                yield implementation
+        else:
+            for i in self.block:
+                yield self.implementationCode(i,store)
+
+        self.forgetRemoved()
 
         # Connecting outputs
-        fileText += "-- Connecting outputs\n"
+        yield "-- Connecting outputs\n"
         for i in self.system_output.input_ports:
-            fileText += "%s <= %s__%s;\n"%(i.name,i.connection.out_block.name,i.connection.out_block.output_ports[i.connection.ind_output].name)
+            yield "%s <= %s__%s;\n"%(i.name,i.connection.out_block.name,i.connection.out_block.output_ports[i.connection.ind_output].name)
+
+        yield "END Arq_%s;\n"%self.name
+
+    def fragment(self,block,store = None):
+        """ Generated code of a block.
+            Only the sections that changed since the last generation are rebuilt,
+            the rest is reused from the fragment cache.
+
+        :Block block:           Block of this system.
+        :FragmentStore store:   Disk cache of the code of the blocks (optional)
+        """
+        frag = self.fragments.get(block)
+        if frag == None:
+            frag = BlockFragment()
+            self.fragments[block] = frag
+        self.updateFragment(frag,block,store)
+        return frag
+
+    def updateFragment(self,frag,block,store = None):
+        """ Rebuild the sections of frag that aren't valid for the block anymore.
+        """
+        if frag.revision != block.revision:
+            frag.declaration = self.declarationCode(block)
+            frag.implementation = self.implementationCode(block,store)
+            frag.revision = block.revision
+
+        # The connections also depend on the names of the blocks that drive this one
+        key = tuple((id(port.connection),port.connection.out_block.revision) for port in block.input_ports)
+        if frag.connectionKey != key or frag.connectionRevision != block.revision:
+            frag.connection = self.connectionCode(block)
+            frag.connectionKey = key
+            frag.connectionRevision = block.revision
+
+    def forgetRemoved(self):
+        """ Forget the code of removed blocks
+        """
+        if len(self.fragments) != len(self.block):
+            alive = set(self.block)
+            for i in [b for b in self.fragments if not b in alive]:
+                del self.fragments[i]
+
+    def prefetch(self,jobs,mode = "process",store = None):
+        """ Render the declaration & implementation of all modified blocks in parallel,
+            and save them on the fragment cache. Workers receive detached copies
+            of the blocks, results are stored in the same order of the blocks.
+
+        :int jobs:              Amount of workers.
+        :string mode:           Workers are "process" or "thread"
+        :FragmentStore store:   Disk cache of the code of the blocks (optional)
+        """
+        stale = [i for i in self.block if self.fragments.get(i) == None or self.fragments[i].revision != i.revision]
+        if len(stale) < 2:
+            return
+
+        revisions = [i.revision for i in stale]
+        copies = [i.detached() for i in stale] if mode == "process" else stale
+        results = lib.Parallel.renderBlocks(copies,jobs,mode,store)
+
+        for block,revision,(declaration,implementation) in zip(stale,revisions,results):
+            frag = self.fragments.get(block)
+            if frag == None:
+                frag = BlockFragment()
+                self.fragments[block] = frag
+            frag.declaration = declaration
+            frag.implementation = implementation
+            frag.revision = revision
+
+    @staticmethod
+    def declarationCode(block):
+        """ Signal declaration of all ports & temporary signals of a block.
+        """
+        inputSig = []
+        outputSig = []
+        tempSig = []
+        for name,size,mode in block.getSignals():
+            if mode == IN:
+                inputSig.append((name,size))
+            elif mode == OUT:
+                outputSig.append((name,size))
+            else:
+                tempSig.append((name,size))
+
+        text = ["\n-- Declaring %s's ports%s\n"%(block.name," & temporary signals" if len(tempSig) != 0 else "")]
+        text.append("-- Input ports\n")
+        for name,size in inputSig:
+            text.append("signal %s__%s: %s;\n"%(block.name,name,signalType(size)))
+
+        text.append("\n-- Output ports\n")
+        for name,size in outputSig:
+            text.append("signal %s__%s: %s;\n"%(block.name,name,signalType(size)))
+
+        if len(tempSig) != 0:
+            text.append("\n-- Temporary signals\n")
+            for name,size in tempSig:
+                text.append("signal %s__%s: %s;\n"%(block.name,name,signalType(size)))
+        return "".join(text)
+
+    def connectionCode(self,block):
+        """ Assignments that link every input port of a block with its driver.
+        """
+        text = []
+        for port_inp in block.input_ports:
+            receiver = block.name + "__" + port_inp.name
+            conn = port_inp.connection
+            if self.system_input == conn.out_block:
+                sender = conn.out_block.output_ports[conn.ind_output].name
+            else:
+                sender = conn.out_block.name + "__" + conn.out_block.output_ports[conn.ind_output].name
+            text.append("%s <= %s;\n"%(receiver, sender))
+        text.append("\n")
+        return "".join(text)
+
+    @staticmethod
+    def implementationCode(block,store = None):
+        """ Statements of a block, as returned by its generate method.
+            If a store is given identical blocks are generated only once.
+        """
+        code = store.generate(block) if store != None else block.generate()
+        return "-- Implementation of %s block\n%s\n"%(block.name,code)
+
+    def buildIndex(self):
+        """ Build the index of the ports of the system.
+            port_index = {String name: (Int position, IN/OUT)}
+        """
+        self.port_index = dict((name,(pos,OUT)) for pos,name in enumerate(self.output_names))
+        self.port_index.update((name,(pos,IN)) for pos,name in enumerate(self.input_names))
+
+    def reserveName(self,name):
+        """ Reserve a block name that is not used in the system.
+            If name is already used it returns name_2, name_3, ...
+            Suffixes are counted for each base name, so it doesn't probe all of them.
+
+        :String name:   Wanted name.
+        """
+        if name in self.block_name:
+            ind = self.name_counter.get(name,2)
+            while "%s_%d"%(name,ind) in self.block_name:
+                ind += 1
+            self.name_counter[name] = ind + 1
+            name = "%s_%d"%(name,ind)
+        self.block_name.add(name)
+        return name
+
+    def reserveDefaultName(self):
+        """ Reserve a default block name: block0, block1, ...
+        """
+        ind = self.name_counter.get(None,0)
+        while "block%d"%ind in self.block_name:
+            ind += 1
+        self.name_counter[None] = ind + 1
+        name = "block%d"%ind
+        self.block_name.add(name)
+        return name
+
+    def releaseName(self,name):
+        """ The name can be used again by other block.
+        """
+        self.block_name.discard(name)
+
+    def record(self,op,*args):
+        """ Record a change of the system on its journal (if it has one)
+        """
+        if self.journal != None:
+            self.journal.record(op,*args)
+
+    def addBlock(self,block):
+        """ Add a block (already created on this system) to the system
+        """
+        with self.lock:
+            self.unshare()
+            self.block.append(block)
+        self.record("add",block)
+
+    def moveBlock(self,block,pos):
+        """ Set the position of a block on the screen.
+        """
+        with self.lock:
+            self.changing(block)
+            block.screenPos = pos
+        self.record("move",block,pos)
+
+    def removeBlock(self,block):
+        """ Remove a block from the system, with all its connections.
+            Its name is released.
+        """
+        with self.lock:
+            self.changing(block)
+            for port in block.input_ports:
+                if port.connection != None:
+                    self.disconnect(port.connection)
+            for port in block.output_ports:
+                for conn in list(port.connection):
+                    self.disconnect(conn)
+
+            self.unshare()
+            self.block.remove(block)
+            self.fragments.pop(block,None)
+            self.releaseName(block.name)
+        self.record("remove",block)
+
+    def snapshot(self):
+        """ Read only view of the system as it is now (see SystemSnapshot).
+            It is taken in constant time: the block list is shared until a block is
+            added or removed, and a block is copied only before it is modified on
+            the system (copy on write). Unmodified blocks are read from the system.
+            Snapshots can be read on other thread while this system is being edited.
+        """
+        with self.lock:
+            snapshot = SystemSnapshot(self)
+            self.snapshots.add(snapshot)
+            self.shared = True
+            return snapshot
+
+    def changing(self,block):
+        """ Must be called, with the lock held, before a block of the system is modified.
+            Live snapshots keep a copy of the block as it was.
+        """
+        for snapshot in self.snapshots:
+            snapshot.freeze(block)
+
+    def view(self,block):
+        """ Block of this system for a block reached through a connection.
+            It is the block itself (see SystemSnapshot.view)
+        """
+        return block
 
-        fileText += "END Arq_%s;\n"%self.name
+    def unshare(self):
+        # Called with the lock held, before the block list is modified
+        if self.shared:
+            self.block = list(self.block)
+            self.shared = False
 
-        # print("\nGENERATED CODE\n")
-        # print(fileText)
-        return fileText
+    def netlist(self):
+        """ Index of the graph of the system in arrays (see lib/Netlist.py)
+            It is built again on every call.
+        """
+        return _Netlist(self)
 
+    def validate(self):
+        """ Check that the system can be generated.
+            Return a list with the description of each problem found.
+        """
+        return self.netlist().validate()
 
     def __getitem__(self, name):
         """ Find a port for his name.
@@ -158,15 +416,7 @@ class System:
 
         :String name: The name of the wanted port/
         """
-        try:
-            pos = self.input_names.index(name)
-            return pos,IN
-        except ValueError:
-            try:
-                pos = self.output_names.index(name)
-                return pos,OUT
-            except ValueError:
-                return -1
+        return self.port_index.get(name,-1)
 
     def connect(self,output_block,ind_output,input_block,ind_input,visualConnection = None):
         """
@@ -176,7 +426,249 @@ class System:
         :param ind_input:
         """
         conn = _Connection(output_block,ind_output,input_block,ind_input,self)  # Creating the connection between 2 blocks
-        output_block.output_ports[ind_output].connection.append(conn)  # Linking the connection with the output block
-        input_block.input_ports[ind_input].connection = conn           # Linking the connection with the input block
-        self.connections.update({conn:visualConnection})   # Adding the connection to the connection list (on the system)
-        return conn
\ No newline at end of file
+        with self.lock:
+            self.changing(output_block)
+            self.changing(input_block)
+            output_block.output_ports[ind_output].addConnection(conn)      # Linking the connection with the output block
+            input_block.input_ports[ind_input].connection = conn           # Linking the connection with the input block
+            input_block.input_ports[ind_input].touch()                     # Its connection code has changed
+            self.connections.update({conn:visualConnection})   # Adding the connection to the connection list (on the system)
+        self.record("connect",conn)
+        return conn
+
+    def disconnect(self,conn):
+        """ Remove a connection between 2 blocks.
+            Return the visual connection that was linked with it.
+        """
+        with self.lock:
+            self.changing(conn.out_block)
+            self.changing(conn.in_block)
+            output_port = conn.out_block.output_ports[conn.ind_output]
+            output_port.connection = [i for i in output_port.connection if i is not conn]
+            input_port = conn.in_block.input_ports[conn.ind_input]
+            input_port.connection = None
+            input_port.touch()
+            visualConnection = self.connections.pop(conn,None)
+        self.record("disconnect",conn)
+        return visualConnection
+
+    def __getstate__(self):
+        # Generated code & graphic items are not saved with the system
+        state = self.__dict__.copy()
+        state["fragments"] = {}
+        state["connections"] = dict.fromkeys(self.connections)
+        state["journal"] = None
+        for name in ("lock","snapshots","shared"):
+            state.pop(name,None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if not "fragments" in state:
+            self.fragments = {}
+        if not "name_counter" in state:
+            self.name_counter = {}
+        if not "port_index" in state:
+            self.buildIndex()
+        if not "journal" in state:
+            self.journal = None
+        self.lock = threading.RLock()
+        self.snapshots = weakref.WeakSet()
+        self.shared = False
+
+class BlockFragment:
+    def __init__(self):
+        """ Cached code of a block.
+            Declaration & implementation are valid while the revision of the block
+            is the same. Connection code also depends on the blocks that drive it.
+        """
+        self.revision = -1
+        self.declaration = ""
+        self.implementation = ""
+
+        self.connectionKey = None
+        self.connectionRevision = -1
+        self.connection = ""
+
+class SystemSnapshot(System):
+    def __init__(self,system):
+        """ Read only view of a system, as it was when the snapshot was taken (see System.snapshot).
+            It reads the blocks of the system itself. A block is copied only before it is
+            modified on the system (see freeze), together with the blocks connected to it,
+            so every original block read from the snapshot is unmodified & only leads to
+            unmodified blocks or copies.
+            Everything that reads a System (code generation, netlist, save) works on it,
+            called through read (a block may be copied & modified while it is being read)
+
+        :System system:     System of the snapshot. Its lock must be held.
+        """
+        self.origin = system
+        self.name = system.name
+        self.input_info = list(system.input_info)
+        self.output_info = list(system.output_info)
+        self.input_names = list(system.input_names)
+        self.output_names = list(system.output_names)
+        self.port_index = system.port_index
+        self.includedLibrary = list(system.includedLibrary)
+        self.journal = None
+
+        self.blocks = system.block  # Block list of the system, it isn't modified while it is shared
+        self.inputBlock = system.system_input
+        self.outputBlock = system.system_output
+        self.copies = {}            # Copy of each block modified on the system <Block: Block>
+        self.originals = {}         # Block of the system of each copy <Block: Block>
+        self.modified = set()       # Blocks modified on the system (they & their neighbors are copied)
+        self.stamp = 0              # It changes every time blocks are copied
+        self.fragments = {}         # Generated code of each block of the system <Block: BlockFragment>
+
+        self.lock = threading.RLock()
+        self.snapshots = weakref.WeakSet()
+        self.shared = False
+
+    def freeze(self,block):
+        """ Copy a block of the system (& the blocks connected to it), as they were when
+            the snapshot was taken. Called with the lock of the system held, before
+            the block is modified.
+        """
+        if block in self.modified:
+            return
+        self.modified.add(block)
+
+        # Blocks connected to it would lead a reader to the modified block
+        neighbors = [port.connection.out_block for port in block.input_ports if port.connection != None]
+        neighbors += [conn.in_block for port in block.output_ports for conn in port.connection]
+        for i in [block] + neighbors:
+            if not i in self.copies:
+                copy = i.detached(self)
+                for port,original in zip(copy.input_ports,i.input_ports):
+                    if original.connection != None:
+                        port.connection = SnapshotConnection(self,original.connection)
+                for port,original in zip(copy.output_ports,i.output_ports):
+                    port.connection = [SnapshotConnection(self,conn) for conn in original.connection]
+                self.copies[i] = copy
+                self.originals[copy] = i
+        self.stamp += 1
+
+    def view(self,block):
+        """ The block as it was when the snapshot was taken: its copy if it was
+            modified on the system, the block itself otherwise.
+            Connections of unmodified blocks lead to the blocks of the system,
+            anything that follows a connection must see its blocks through view.
+        """
+        return self.copies.get(block,block)
+
+    def read(self,function,*args):
+        """ Call function(*args), that reads the snapshot, & return its result.
+            It is called again if a block was copied while it was running, since
+            it could have read a block that was being modified.
+        """
+        while True:
+            stamp = self.stamp
+            try:
+                result = function(*args)
+            except Exception:
+                if stamp == self.stamp:
+                    raise
+                continue
+            if stamp == self.stamp:
+                return result
+
+    def fragment(self,block,store = None):
+        """ Generated code of a block (see System.fragment). Code generated on the
+            system is reused if the block wasn't modified.
+        """
+        block = self.originals.get(block,block)
+        frag = self.fragments.get(block)
+        if frag == None:
+            frag = self.origin.fragments.get(block)
+
+        def build():
+            work = _copy.copy(frag) if frag != None else BlockFragment()
+            self.updateFragment(work,self.view(block),store)
+            return work
+
+        frag = self.read(build)
+        self.fragments[block] = frag
+        return frag
+
+    def netlist(self):
+        return self.read(_Netlist,self)
+
+    def prefetch(self,jobs,mode = "process",store = None):
+        # Blocks are rendered one by one, each one checked by read (see fragment)
+        pass
+
+    def forgetRemoved(self):
+        # The blocks of a snapshot are never removed
+        pass
+
+    def publish(self):
+        """ Give the code generated on the snapshot to the system, for the blocks that
+            weren't modified since the snapshot was taken, so the next generation
+            reuses it. Called on the thread that modifies the system.
+        """
+        with self.origin.lock:
+            alive = set(self.origin.block)
+            for block,frag in self.fragments.items():
+                if frag.revision == block.revision and block in alive:
+                    current = self.origin.fragments.get(block)
+                    if current == None or current.revision != block.revision:
+                        if block in self.copies:
+                            frag.connectionKey = None   # Its key has connections of the snapshot
+                        self.origin.fragments[block] = frag
+
+    @property
+    def block(self):
+        return [self.view(i) for i in self.blocks]
+
+    @property
+    def system_input(self):
+        return self.view(self.inputBlock)
+
+    @property
+    def system_output(self):
+        return self.view(self.outputBlock)
+
+    @property
+    def connections(self):
+        blocks = [self.system_output] + self.block
+        return dict.fromkeys(port.connection for block in blocks for port in block.input_ports if port.connection != None)
+
+    def record(self,op,*args):
+        raise TypeError("A snapshot of a system can't be modified")
+
+    changing = record
+
+class SnapshotConnection(_Connection):
+    __slots__ = ("snapshot","connection")
+
+    def __init__(self,snapshot,connection):
+        """ Connection of a copied block on a snapshot. Its blocks are seen as
+            they were when the snapshot was taken (see SystemSnapshot.view)
+        """
+        self.snapshot = snapshot
+        self.connection = connection
+
+    @property
+    def out_block(self):
+        return self.snapshot.view(self.connection.out_block)
+
+    @property
+    def in_block(self):
+        return self.snapshot.view(self.connection.in_block)
+
+    @property
+    def ind_output(self):
+        return self.connection.ind_output
+
+    @property
+    def ind_input(self):
+        return self.connection.ind_input
+
+    @property
+    def size(self):
+        return self.connection.size
+
+    @property
+    def system(self):
+        return self.snapshot
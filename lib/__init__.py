@@ -5,8 +5,10 @@
 
 from .Block import *
 from .Connection import *
-from .ProjectInterface import *
 from .System import *
 
+# The graphic interface (lib.ProjectInterface) is imported by data.MainWindow,
+# so the abstract model can be used without PyQt4 (see generate.py)
+
 IN = 1
 OUT = 0
\ No newline at end of file
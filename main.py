@@ -12,9 +12,6 @@ __author__ = "BlakeTeam"
 import sys
 import os
 
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-
 data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'data'))
 lib_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'lib'))
 visual_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'visual'))
@@ -23,13 +20,29 @@ sys.path.append(lib_dir)
 sys.path.append(visual_dir)
 sys.path.append(data_dir)
 
-from MainWindow import MainWindow
+# Imported before everything else, so it can measure the rest of the imports
+import StartupTrace
+StartupTrace.enable()
 
-if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    window = MainWindow()
+with StartupTrace.phase("Imports"):
+    from PyQt4.QtCore import *
+    from PyQt4.QtGui import *
+
+    # From the data package: importing MainWindow from data_dir would load a second copy
+    from data.MainWindow import MainWindow
 
-    window.showMaximized()
+StartupTrace.instrument(MainWindow, "initializeUI", "loadBlocks", "loadWorkspace")
+
+if __name__ == '__main__':
+    with StartupTrace.phase("QApplication"):
+        app = QApplication(sys.argv)
+    with StartupTrace.phase("MainWindow"):
+        window = MainWindow()
+
+    with StartupTrace.phase("Show"):
+        window.showMaximized()
+    # Reported once the event loop starts, after the window is painted the first time
+    QTimer.singleShot(0, StartupTrace.report)
     sys.exit(app.exec_())
 
 # TODO: ->	Guardar y cargar proyectos
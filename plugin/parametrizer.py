@@ -2,15 +2,21 @@ from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 from PyQt4 import uic
 
+import lib.FormCache
+
 import pickle
 import os
 
+import data.constants
+import lib.BlockRegistry
+
 class Parametrizer(QWidget):
     def __init__(self):
         super().__init__()
 
         self.name = None
-        self.ui = uic.loadUi(r'plugin\parametrizer.ui',self)
+        self.registry = lib.BlockRegistry.registry()
+        self.ui = lib.FormCache.loadUi(r'plugin\parametrizer.ui',self)
         self.setWindowTitle("Parametrizer")
 
         self.ui.accept.clicked.connect(self.ok)
@@ -40,36 +46,30 @@ class Parametrizer(QWidget):
                 name = os.path.splitext(i)[0]
                 child = QTreeWidgetItem([name])
 
-                mod = self.isDynamicBlock(curPath)
-                if mod:
-                    fileItems.append((child,self.dynamicIco,mod))
-                    # self.blocks.append((child,curPath,data.constants.DYNAMIC_BLOCK,mod))
+                entry = self.isDynamicBlock(curPath)
+                if entry:
+                    fileItems.append((child,self.dynamicIco,entry))
                     files = True
 
         for i in dirItems:
             item.addChild(i)
-        for i,j,mod in fileItems:
-            i.mod = mod
+        for i,j,entry in fileItems:
+            i.entry = entry
             item.addChild(i)
             i.setIcon(0,j)
         return files
 
-    @staticmethod
-    def isDynamicBlock(path):
+    def isDynamicBlock(self,path):
         """ Check if the file refers to a dynamic block
-            It returns the module if it is a dynamic block
+            It returns the registry entry if it is a dynamic block
         """
-        if os.path.splitext(path)[1] == ".py":
-            name = os.path.splitext(os.path.split(path)[1])[0]
-            mod = __import__(name)
-            try:
-                if mod.__isBlock__:
-                    return mod
-            except:
-                return False
+        entry = self.registry.lookup(path)
+        if entry != None and entry.type == data.constants.DYNAMIC_BLOCK:
+            return entry
         return False
 
     def loadBlocks(self):
+        self.registry.scan()
         os.chdir("blocks")
         path = os.getcwd()
         for i in os.listdir():
@@ -91,7 +91,7 @@ class Parametrizer(QWidget):
     def ok(self):
         try:
             item = self.ui.blockTree.selectedItems()[0]
-            self.mod = item.mod
+            self.mod = self.registry.load(item.entry)
             print(self.mod.__className__)
 
             self.name = self.ui.lineEdit.text()
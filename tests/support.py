@@ -0,0 +1,74 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Test Support
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+# Systems built with the blocks of the standard library, for the tests.
+# The block libraries are importable as in generate.py, so saved projects
+# can be loaded again.
+
+import sys
+import os
+import importlib
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),".."))
+blocks_dir = os.path.join(root_dir,"blocks")
+
+if not root_dir in sys.path:
+    sys.path.append(root_dir)
+for library in sorted(os.listdir(blocks_dir)):
+    if os.path.isdir(os.path.join(blocks_dir,library)) and not os.path.join(blocks_dir,library) in sys.path:
+        sys.path.append(os.path.join(blocks_dir,library))
+
+from lib.System import System
+
+def gate(name,system,*args):
+    """ Gate of the standard library (name is AND, OR, XNOR, ...)
+        args are the parameters of the gate: numInput, sizeInput (only sizeInput for NOT)
+    """
+    module = importlib.import_module("Gate %s"%name)
+    return getattr(module,"%sGate"%name)(system,*args)
+
+def buildSystem():
+    """ System y = (a and b) xnor c xnor a, z = not c
+    """
+    system = System("test",[("a",1),("b",1),("c",1)],[("y",1),("z",1)])
+    first = gate("AND",system,2,1)
+    second = gate("XNOR",system,3,1)
+    third = gate("NOT",system,1)
+    for block in (first,second,third):
+        system.addBlock(block)
+
+    inp = system.system_input
+    system.connect(inp,0,first,0)
+    system.connect(inp,1,first,1)
+    system.connect(first,0,second,0)
+    system.connect(inp,2,second,1)
+    system.connect(inp,0,second,2)
+    system.connect(inp,2,third,0)
+    system.connect(second,0,system.system_output,0)
+    system.connect(third,0,system.system_output,1)
+    return system
+
+def code(system):
+    """ VHDL code of a system, the same text on every call (see System.iterVHDLCode)
+    """
+    return "".join(system.iterVHDLCode(deterministic = True))
+
+def buildChain(length):
+    """ System with a chain of length AND gates: y = a and b and b ...
+    """
+    system = System("chain",[("a",1),("b",1)],[("y",1)])
+    previous,index = system.system_input,0
+    for i in range(length):
+        block = gate("AND",system,2,1)
+        system.addBlock(block)
+        system.connect(previous,index,block,0)
+        system.connect(system.system_input,1,block,1)
+        previous,index = block,0
+    system.connect(previous,index,system.system_output,0)
+    return system
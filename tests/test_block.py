@@ -0,0 +1,43 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Block Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import unittest
+
+import support
+from lib.Block import Port
+
+class BlockTest(unittest.TestCase):
+    def legacyCopy(self,block):
+        """ Block restored from the state it had on files saved before ports had a block
+            (the state of their old __dict__, without block)
+        """
+        state = block.__dict__.copy()
+        for name in ("input_ports","output_ports"):
+            ports = []
+            for port in state[name]:
+                legacy = Port.__new__(Port)
+                legacy.__setstate__(({"name":port.name,"size":port.size,"mode":port.mode,"connection":port._connection},None))
+                ports.append(legacy)
+            state[name] = ports
+        copy = block.__class__.__new__(block.__class__)
+        copy.__setstate__(state)
+        return copy
+
+    def testLegacyPortsTouchTheirBlock(self):
+        system = support.buildSystem()
+        block = self.legacyCopy(system.block[1])
+        for port in block.input_ports + block.output_ports:
+            self.assertIs(port.block,block)
+
+        revision = block.revision
+        block.output_ports[0].setName("result")
+        self.assertNotEqual(block.revision,revision)
+
+if __name__ == "__main__":
+    unittest.main()
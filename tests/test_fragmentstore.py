@@ -0,0 +1,42 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Fragment Store Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import sys
+import tempfile
+import unittest
+
+import support
+from lib.FragmentStore import FragmentStore
+
+class FragmentStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = FragmentStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testIdenticalBlocksShareCode(self):
+        first = support.buildSystem().block[0]
+        second = support.buildSystem().block[0]
+        self.assertEqual(self.store.generate(first),first.generate())
+        self.assertEqual(self.store.generate(second),second.generate())
+        self.assertEqual((self.store.hits,self.store.misses),(1,1))
+
+    def testKeyDependsOnBlockModule(self):
+        # The names of the signals are given by lib/Block.py
+        block = support.buildSystem().block[0]
+        key = self.store.key(block)
+        path = sys.modules["lib.Block"].__file__
+        self.store.moduleHash[path] = (os.stat(path).st_mtime,"changed")
+        self.assertNotEqual(self.store.key(block),key)
+
+if __name__ == "__main__":
+    unittest.main()
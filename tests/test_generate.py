@@ -0,0 +1,41 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Headless Generator Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+
+import support
+from lib import ProjectFile
+
+# Generate a project on a new interpreter & print the modules of the interface it loaded
+SCRIPT = """
+import sys
+sys.path.insert(0,%r)
+import generate
+generate.generateProject(%r)
+print(" ".join(sorted(m for m in sys.modules if m.startswith(("PyQt4","visual","lib.FormCache","lib.ProjectInterface")))))
+"""
+
+class GenerateTest(unittest.TestCase):
+    def testNoInterfaceModules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory,"project.vcgp")
+            system = support.buildSystem()
+            ProjectFile.saveSystem(system,path)
+
+            output = subprocess.check_output([sys.executable,"-c",SCRIPT%(support.root_dir,path)],universal_newlines = True)
+            self.assertEqual(output.strip(),"")
+            with open(os.path.join(directory,"project.vhd")) as file:
+                self.assertIn("xnor",file.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Incremental Generation Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import unittest
+import unittest.mock
+
+import support
+from lib.System import System
+
+class IncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.system = support.buildSystem()
+        self.generated = []
+        implementationCode = System.implementationCode
+        def counted(block,store = None):
+            self.generated.append(block.name)
+            return implementationCode(block,store)
+        patcher = unittest.mock.patch.object(System,"implementationCode",staticmethod(counted))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self):
+        """ Code of the system & names of the blocks that were generated again
+        """
+        self.generated = []
+        code = support.code(self.system)
+        return code,self.generated
+
+    def fresh(self):
+        # Code of the system without the fragment cache
+        fragments = self.system.fragments
+        self.system.fragments = {}
+        try:
+            return support.code(self.system)
+        finally:
+            self.system.fragments = fragments
+
+    def testUnchanged(self):
+        first,generated = self.generate()
+        self.assertEqual(len(generated),3)
+        second,generated = self.generate()
+        self.assertEqual(generated,[])
+        self.assertEqual(first,second)
+
+    def testRename(self):
+        self.generate()
+        first,second,third = self.system.block
+        third.setName("renamed")
+        code,generated = self.generate()
+        self.assertEqual(generated,["renamed"])
+        self.assertIn("renamed__in0",code)
+        self.assertEqual(code,self.fresh())
+
+        # The blocks driven by a renamed block read its new name
+        first.setName("driver")
+        code,generated = self.generate()
+        self.assertIn("driver",generated)
+        self.assertEqual(code,self.fresh())
+
+    def testConnections(self):
+        self.generate()
+        first,second,third = self.system.block
+        self.system.disconnect(second.input_ports[1].connection)
+        self.system.connect(third,0,second,1)
+        code,generated = self.generate()
+        self.assertNotIn(first.name,generated)
+        self.assertEqual(code,self.fresh())
+
+    def testPortRename(self):
+        self.generate()
+        first = self.system.block[0]
+        first.output_ports[0].setName("result")
+        code,generated = self.generate()
+        self.assertIn("%s__result"%first.name,code)
+        self.assertEqual(code,self.fresh())
+
+    def testRemovedBlocksAreForgotten(self):
+        self.generate()
+        third = self.system.block[2]
+        self.system.removeBlock(third)
+        self.assertNotIn(third,self.system.fragments)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Layout Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import unittest
+
+import support
+from lib import Layout
+from lib.System import System
+
+class LayoutTest(unittest.TestCase):
+    def buildWide(self):
+        """ System with a 40 input AND gate & a NOT gate on the same layer
+        """
+        system = System("wide",[("a",1)],[("y",1),("z",1)])
+        wide = support.gate("AND",system,40,1)
+        other = support.gate("NOT",system,1)
+        system.addBlock(wide)
+        system.addBlock(other)
+        for i in range(40):
+            system.connect(system.system_input,0,wide,i)
+        system.connect(system.system_input,0,other,0)
+        system.connect(wide,0,system.system_output,0)
+        system.connect(other,0,system.system_output,1)
+        return system,wide,other
+
+    def testCollapsedHeight(self):
+        system,wide,other = self.buildWide()
+        # 40 inputs are drawn with 2 bus pins
+        self.assertEqual(Layout.blockHeight(wide),3*Layout.PORT_DISTANCE)
+        self.assertEqual(Layout.blockHeight(wide,True),41*Layout.PORT_DISTANCE)
+
+    def testLayoutUsesDrawnHeight(self):
+        system,wide,other = self.buildWide()
+        for expanded in (set(),{wide}):
+            Layout.layout(system,expanded = expanded)
+            top,bottom = sorted((wide,other),key = lambda block: block.screenPos[1])
+            space = bottom.screenPos[1] - top.screenPos[1] - Layout.blockHeight(top,top in expanded)
+            self.assertEqual(space,Layout.BLOCK_DISTANCE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Parallel Generation Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import unittest
+import unittest.mock
+
+import support
+import lib.Parallel
+
+class ParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.expected = support.code(support.buildChain(300))
+
+    def generate(self,**options):
+        system = support.buildChain(300)
+        return "".join(system.iterVHDLCode(deterministic = True,**options))
+
+    def testSameCode(self):
+        for mode in ("thread","process"):
+            for cache in (True,False):
+                self.assertEqual(self.generate(jobs = 2,mode = mode,cache = cache),self.expected,"%s cache=%s"%(mode,cache))
+
+    def testBoundedWindow(self):
+        # Only WINDOW chunks for each worker are sent before the first result is given
+        blocks = support.buildChain(1000).block
+        sent = []
+        render = lib.Parallel._render
+        def counted(chunk,*args):
+            sent.append(len(chunk))
+            return render(chunk,*args)
+
+        with unittest.mock.patch("lib.Parallel._render",counted):
+            results = lib.Parallel.iterRenderBlocks(blocks,2,"thread")
+            next(results)
+            self.assertLessEqual(sum(sent),(2*lib.Parallel.WINDOW + 1)*lib.Parallel.CHUNK)
+            self.assertEqual(len(list(results)),len(blocks) - 1)
+        self.assertEqual(sum(sent),len(blocks))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Project File Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import tempfile
+import unittest
+
+import support
+from lib import ProjectFile
+from lib import Journal
+
+class ProjectFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name,"project.vcgp")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testRoundTrip(self):
+        system = support.buildSystem()
+        system.moveBlock(system.block[1],(30,40))
+        ProjectFile.saveSystem(system,self.path,3)
+
+        header = ProjectFile.readHeader(self.path)
+        self.assertEqual((header["name"],header["blocks"],header["generation"]),("test",3,3))
+
+        loaded = ProjectFile.loadSystem(self.path)
+        self.assertEqual(support.code(loaded),support.code(system))
+        self.assertEqual([block.screenPos for block in loaded.block],[block.screenPos for block in system.block])
+        self.assertEqual(loaded.block_name,system.block_name)
+
+    def testJournalReplay(self):
+        system = support.buildSystem()
+        ProjectFile.saveSystem(system,self.path)
+        journal = Journal.Journal.open(self.path)
+        journal.attach(system)
+
+        # Changes made after the project was saved
+        first,second,third = system.block
+        second.setName("renamed")
+        system.moveBlock(first,(10,20))
+        system.moveBlock(first,(15,25))
+        added = support.gate("OR",system,2,1)
+        system.addBlock(added)
+        system.connect(system.system_input,0,added,0)
+        system.connect(third,0,added,1)
+        system.removeBlock(third)
+        journal.flush()
+        journal.detach()
+
+        # A record that was not completely written is ignored
+        with open(Journal.journalPath(self.path),"ab") as file:
+            file.write(b"\x50\x00\x00\x00abc")
+
+        loaded = ProjectFile.loadSystem(self.path)
+        replayed = Journal.Journal.open(self.path)
+        self.assertGreater(replayed.replay(loaded),0)
+        self.assertEqual([block.name for block in loaded.block],[block.name for block in system.block])
+        self.assertEqual(loaded.block[0].screenPos,(15,25))
+        self.assertEqual(len(loaded.connections),len(system.connections))
+        self.assertEqual(loaded.validate(),system.validate())
+
+    def testCompaction(self):
+        system = support.buildSystem()
+        ProjectFile.saveSystem(system,self.path)
+        journal = Journal.Journal.open(self.path)
+        journal.attach(system)
+        system.moveBlock(system.block[0],(1,1))
+        journal.compact()
+        journal.detach()
+
+        loaded = ProjectFile.loadSystem(self.path)
+        replayed = Journal.Journal.open(self.path)
+        self.assertEqual(replayed.generation,1)
+        self.assertEqual(replayed.replay(loaded),0)
+        self.assertEqual(loaded.block[0].screenPos,(1,1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Simulator Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import itertools
+import unittest
+
+import support
+from lib.System import System
+from lib.Simulator import Simulator
+
+# Operators of the generated code, VHDL evaluates them from left to right
+OPERATORS = {"and":lambda a,b: a & b,
+             "or":lambda a,b: a | b,
+             "xor":lambda a,b: a ^ b,
+             "xnor":lambda a,b: 1 - (a ^ b)}
+
+def evaluateCode(code,values):
+    """ Value of the one bit assignment "out <= x op y op z;" generated by a gate.
+
+    :dict values:   {string signal: int bit}
+    """
+    tokens = code.split("<=")[1].strip().rstrip(";").split()
+    result = values[tokens[0]]
+    for op,name in zip(tokens[1::2],tokens[2::2]):
+        result = OPERATORS[op](result,values[name])
+    return result
+
+class GateTest(unittest.TestCase):
+    def checkGate(self,name,numInput):
+        """ Simulate every input vector of a gate & compare it with its generated code
+        """
+        system = System("gate",[("i%d"%i,1) for i in range(numInput)],[("y",1)])
+        block = support.gate(name,system,numInput,1)
+        system.addBlock(block)
+        for i in range(numInput):
+            system.connect(system.system_input,i,block,i)
+        system.connect(block,0,system.system_output,0)
+
+        vectors = list(itertools.product((0,1),repeat = numInput))
+        outputs = Simulator(system).run(dict(("i%d"%i,[v[i] for v in vectors]) for i in range(numInput)))
+
+        code = block.generate()
+        for vector,output in zip(vectors,outputs["y"]):
+            values = dict((block.getInputSignalName(i),bit) for i,bit in enumerate(vector))
+            self.assertEqual(int(output),evaluateCode(code,values),"%s %s"%(name,vector))
+
+    def testXNOR(self):
+        for numInput in (2,3,4,5):
+            self.checkGate("XNOR",numInput)
+
+    def testXOR(self):
+        for numInput in (2,3):
+            self.checkGate("XOR",numInput)
+
+    def testANDOR(self):
+        for name in ("AND","OR"):
+            self.checkGate(name,3)
+
+if __name__ == "__main__":
+    unittest.main()
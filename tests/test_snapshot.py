@@ -0,0 +1,62 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Snapshot Tests
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+import os
+import tempfile
+import unittest
+
+import support
+from lib import ProjectFile
+from lib.Simulator import Simulator
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.system = support.buildSystem()
+        self.expected = support.code(self.system)
+        self.snapshot = self.system.snapshot()
+
+    def edit(self):
+        """ Rename, move & disconnect the NOT gate after the snapshot was taken.
+            The system input & output are copied on the snapshot with it, the
+            AND gate is not (its connections lead to the copied system input)
+        """
+        first,second,third = self.system.block
+        third.setName("renamed")
+        self.system.moveBlock(third,(100,100))
+        self.system.disconnect(third.output_ports[0].connection[0])
+
+    def testCodeIsIsolated(self):
+        self.edit()
+        self.assertEqual(self.snapshot.read(support.code,self.snapshot),self.expected)
+        self.assertEqual(self.system.validate(),["Input SystemOutput.z is not connected"])
+
+    def testNetlistAfterEdit(self):
+        self.edit()
+        netlist = self.snapshot.netlist()
+        self.assertEqual(self.snapshot.validate(),[])
+        # The first input of the AND gate is driven by the input a, the NOT gate by c
+        self.assertEqual(netlist.portName(netlist.driver[netlist.inputPort(2,0)]),"SystemInput.a")
+        self.assertEqual(netlist.portName(netlist.driver[netlist.inputPort(4,0)]),"SystemInput.c")
+
+    def testSimulateAfterEdit(self):
+        self.edit()
+        outputs = Simulator(self.snapshot).run({"a":[0,1],"b":[0,1],"c":[0,0]})
+        self.assertEqual(list(outputs["z"]),[1,1])
+
+    def testSaveAfterEdit(self):
+        self.edit()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory,"snapshot.vcgp")
+            self.snapshot.read(ProjectFile.saveSystem,self.snapshot,path)
+            loaded = ProjectFile.loadSystem(path)
+        self.assertEqual(support.code(loaded),self.expected)
+        self.assertEqual(loaded.block[2].screenPos,self.snapshot.block[2].screenPos)
+
+if __name__ == "__main__":
+    unittest.main()
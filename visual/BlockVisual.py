@@ -7,71 +7,135 @@
 
 __author__ = "BlakeTeam"
 
+import weakref
+
 from PyQt4.QtCore import *
 from PyQt4.QtGui import *
 
 import data.constants
+import lib.Layout as Layout
 import visual.ViewVisual
 from lib import *
 from visual import *
 
 class QBlock(QGraphicsItem):
-    DX = 10 # Distance between ports
+    DX = Layout.PORT_DISTANCE   # Distance between ports
     PORT_SIZE = DX/2
     COLOR = 0,100,0,100 # Red, Green, Blue, Alpha
     WIDTH = 40
+    LOD_SIMPLE = 0.5    # Below this level of detail blocks are drawn as plain rectangles
+    COLLAPSE_PORTS = Layout.COLLAPSE_PORTS  # Sides with more ports are drawn with bus pins, until the block is expanded
+    BUS_GROUP = Layout.BUS_GROUP            # Ports drawn by each bus pin
+
+    expandedBlocks = weakref.WeakSet()  # Abstract blocks drawn with a pin for each port (see setExpanded)
 
     def __init__(self, block, view = None):
         """ QGraphicsItem that represent the Blocks of VHDL Code.
         """
         super().__init__()
         self.block = block
+        self.redraw = view.connectionRedraw if view != None else None
+        self.pinIndex = view.pinIndex if view != None else None
+        self.virtualizer = view.virtualizer if view != None else None
         self.setPos(*block.screenPos)
-        self.height = QBlock.DX*(max(len(self.block.input_ports), len(self.block.output_ports))+1)
         # self.width = self.height/
         self.width = QBlock.WIDTH
 
-        x0,y0 = block.screenPos
-        print(x0,y0)
         self.inputPort = []
         self.outputPort = []
 
-        self.rect = QRectF(0,0,self.width,self.height)
-
         self.setFlag(QGraphicsItem.ItemIsMovable)
+        self.setFlag(QGraphicsItem.ItemIsSelectable)  # Several blocks can be dragged together
         self.setCursor(Qt.OpenHandCursor)
 
-        di = self.height/(len(self.block.input_ports) + 1)
-        do = self.height/(len(self.block.output_ports) + 1)
-
         scene = view.scene()
         self.scene = scene
+        self.createPins()
+
+        # Pins are moved with the block (see itemChange)
+        self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
+
+    def createPins(self):
+        """ Create the pins of the block. Wide sides have a bus pin for each range of ports.
+        """
+        self.height = QBlock.blockHeight(self.block)
+        self.rect = QRectF(0,0,self.width,self.height)
+        x0,y0 = self.block.screenPos
+
+        for mode,ports,pins in ((IN,self.block.input_ports,self.inputPort),(OUT,self.block.output_ports,self.outputPort)):
+            dy = self.height/(QBlock.slotCount(self.block,len(ports)) + 1)
+            if QBlock.isCollapsed(self.block,len(ports)):
+                for slot,first in enumerate(range(0,len(ports),QBlock.BUS_GROUP)):
+                    pin = QBusPin(x0,y0,slot,first,min(QBlock.BUS_GROUP,len(ports) - first),mode,dy,self)
+                    pins.append(pin)
+                    self.scene.addItem(pin)
+                    for port in ports[first:first + QBlock.BUS_GROUP]:
+                        port.pin = pin
+            else:
+                for i in range(len(ports)):
+                    pin = QPin(x0,y0,i,mode,dy,self)
+                    pins.append(pin)
+                    self.scene.addItem(pin)
+                    ports[i].pin = pin
+
+    def removePins(self):
+        for pin in self.inputPort + self.outputPort:
+            if self.pinIndex != None:
+                self.pinIndex.remove(pin)
+            self.scene.removeItem(pin)
+        self.inputPort = []
+        self.outputPort = []
+
+    def isWide(self):
+        return max(len(self.block.input_ports),len(self.block.output_ports)) > QBlock.COLLAPSE_PORTS
 
-        # Drawing input ports
-        for i in range(len(self.block.input_ports)):
-            pin = QPin(x0,y0,i,IN,di,self)
-            # self.inputPort.addPin(pin)
-            self.inputPort.append(pin)
-            scene.addItem(pin)
-            self.block.input_ports[i].pin = pin
-
-        # Drawing output ports
-        for i in range(len(self.block.output_ports)):
-            pin = QPin(x0,y0,i,OUT,do,self)
-            # self.outputPort.addPin(pin)
-            self.outputPort.append(pin)
-            scene.addItem(pin)
-            self.block.output_ports[i].pin = pin
+    def setExpanded(self,expanded):
+        """ Draw every port of a wide block with its own pin (expanded), or with bus pins.
+        """
+        if expanded:
+            QBlock.expandedBlocks.add(self.block)
+        else:
+            QBlock.expandedBlocks.discard(self.block)
+        self.prepareGeometryChange()
+        self.removePins()
+        self.createPins()
+        self.updatePorts()
+        if self.virtualizer != None:
+            self.virtualizer.blockMoved(self.block)
+
+    def mouseDoubleClickEvent(self, event):
+        super().mouseDoubleClickEvent(event)
+        if self.isWide():
+            self.setExpanded(not self.block in QBlock.expandedBlocks)
 
     def updatePorts(self):
+        """ Recompute the geometry of the pins, after the block is moved.
+        """
         for i in self.inputPort:
             i.myUpdate()
         for i in self.outputPort:
             i.myUpdate()
 
-    def mouseMoveEvent(self,event):
-        super().mouseMoveEvent(event)
-        self.updatePorts()
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemPositionHasChanged:
+            # Pins, connections & the position of the block are updated on the next frame
+            if self.redraw != None:
+                self.redraw.blockMoved(self)
+            else:
+                self.updatePorts()
+                self.commitPosition()
+        return super().itemChange(change, value)
+
+    def commitPosition(self):
+        """ Save the position of the item on the abstract block.
+            Every moved block is saved, not only the one under the mouse (selected
+            blocks are dragged together)
+        """
+        pos = (self.pos().x(), self.pos().y())
+        if pos != tuple(self.block.screenPos):
+            self.block.system.moveBlock(self.block,pos)
+            if self.virtualizer != None:
+                self.virtualizer.blockMoved(self.block)
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
@@ -80,8 +144,31 @@ class QBlock(QGraphicsItem):
     def mouseReleaseEvent(self, event):
         super().mouseReleaseEvent(event)
         self.setCursor(Qt.OpenHandCursor)
-        self.block.screenPos = (self.pos().x(), self.pos().y())
-        self.updatePorts()
+
+    # Pins of the abstract blocks, with the rules of lib/Layout.py
+
+    @staticmethod
+    def isCollapsed(block, count):
+        return Layout.isCollapsed(count,block in QBlock.expandedBlocks)
+
+    @staticmethod
+    def slotCount(block, count):
+        return Layout.slotCount(count,block in QBlock.expandedBlocks)
+
+    @staticmethod
+    def slotOf(block, count, index):
+        return Layout.slotOf(count,index,block in QBlock.expandedBlocks)
+
+    @staticmethod
+    def blockHeight(block):
+        return Layout.blockHeight(block,block in QBlock.expandedBlocks)
+
+    @staticmethod
+    def blockRect(block):
+        """ Area of the scene used by an abstract block (pins included), it may not have a QBlock.
+        """
+        x,y = block.screenPos
+        return QRectF(x - QBlock.PORT_SIZE, y, QBlock.WIDTH + 2*QBlock.PORT_SIZE, QBlock.blockHeight(block))
 
     def boundingRect(self):
         return self.rect
@@ -93,6 +180,8 @@ class QBlock(QGraphicsItem):
 
     def paint(self,painter,styleOptionGraphicsItem,widget):
         painter.fillRect(0,0,self.width,self.height,QColor(*QBlock.COLOR))
+        if styleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) < QBlock.LOD_SIMPLE:
+            return
         painter.drawRect(0,0,self.width,self.height)
         # di = self.height/(len(self.block.input_ports) + 1)
         # do = self.height/(len(self.block.output_ports) + 1)
@@ -100,9 +189,34 @@ class QBlock(QGraphicsItem):
 class ExternalBlock(QBlock):
     def __init__(self,block,view = None):
         super().__init__(block,view)
+        self.virtualizer = None     # The system input & output always have items
+
+class PinEnd:
+    def __init__(self, x1, y1):
+        """ Outer end of the pin of a block that has no QBlock (see SceneVirtualizer)
+        """
+        self.x1 = x1
+        self.y1 = y1
 
 class QPin(QGraphicsLineItem):
     # selected = pyqtSignal(QPin)
+    LOD_VISIBLE = 0.6   # Below this level of detail pins are not drawn
+
+    @staticmethod
+    def endOf(block, mode, index):
+        """ Pin of a port of an abstract block, or the position where it would be
+            if the block has no QBlock.
+        """
+        ports = block.input_ports if mode == IN else block.output_ports
+        if ports[index].pin != None:
+            return ports[index].pin
+        x,y = block.screenPos
+        height = QBlock.blockHeight(block)
+        slot = QBlock.slotOf(block,len(ports),index)
+        dy = height/(QBlock.slotCount(block,len(ports)) + 1)
+        if mode == IN:
+            return PinEnd(x - QBlock.PORT_SIZE, y + dy*(slot + 1))
+        return PinEnd(x + QBlock.WIDTH + QBlock.PORT_SIZE, y + dy*(slot + 1))
 
     def __init__(self, x, y, index, mode, dy, parent):
         """
@@ -116,22 +230,20 @@ class QPin(QGraphicsLineItem):
         """
         super().__init__()
         self.dy = dy
+        self.slot = index   # Position of the pin on its side of the block
         self.index = index
         self.mode = mode
         self.block = parent
         self.setCursor(Qt.CrossCursor)
+        self.rect = QRectF()
         self.myUpdate()
-        self.rect = QRectF(min(self.x1, self.x2), min(self.y1, self.y2)-2, abs(self.x1 - self.x2), 4)
-        self._shape = QPainterPath()
-        self._shape.addRect(self.rect)
         # parent.scene.addItem(QGraphicsRectItem(self.rect))
 
     def boundingRect(self):
-        self.myUpdate()
+        # The geometry is cached, it only changes when the block is moved (see myUpdate)
         return self.rect
 
     def shape(self):
-        self.myUpdate()
         return self._shape
 
     def getPort(self):
@@ -143,10 +255,23 @@ class QPin(QGraphicsLineItem):
     def getSize(self):
         return self.getPort().size
 
+    def ports(self):
+        """ Abstract ports drawn by this pin.
+        """
+        return [self.getPort()]
+
     def getAbstractBlock(self):
         return self.block.block
 
     def myUpdate(self):
+        """ Recompute the geometry of the pin & the lines of its connections.
+        """
+        self.updateGeometry()
+        self.updateConnections()
+
+    def updateGeometry(self):
+        """ Recompute the geometry of the pin. It is called when the block moves.
+        """
         point = self.block.scenePos()
         self.x = point.x()
         self.y = point.y()
@@ -155,35 +280,89 @@ class QPin(QGraphicsLineItem):
         # x1,y1 is the out node in both cases.
         if self.mode == IN:
             self.x1 = -QBlock.PORT_SIZE + self.x
-            self.y1 = self.dy * (self.index + 1) + self.y
+            self.y1 = self.dy * (self.slot + 1) + self.y
             self.x2 = self.x
             self.y2 = self.y1
         else:
             self.x1 = QBlock.WIDTH + QBlock.PORT_SIZE + self.x
-            self.y1 = self.dy*(self.index + 1) + self.y
+            self.y1 = self.dy*(self.slot + 1) + self.y
             self.x2 = QBlock.WIDTH + self.x
             self.y2 = self.y1
 
+        self.prepareGeometryChange()
         self.rect = QRectF(min(self.x1, self.x2), min(self.y1, self.y2)-2, abs(self.x1 - self.x2), 4)
         self._shape = QPainterPath()
         self._shape.addRect(self.rect)
 
         self.setLine(self.x1,self.y1,self.x2,self.y2)
 
-        # Update Connection
-        port = self.getPort()
-        if port.mode == data.constants.IN:
-            if port.connection != None:
-                connLine = self.getAbstractBlock().system.connections[port.connection]
-                otherPin = port.connection.out_block.output_ports[port.connection.ind_output].pin
-                QView.paintConnection(self,otherPin,connLine)
-                connLine.update()
-        else:
-            for i in port.connection:
-                connLine = self.getAbstractBlock().system.connections[i]
-                otherPin = i.in_block.input_ports[i.ind_input].pin
-                QView.paintConnection(otherPin,self,connLine)
-                connLine.update()
+        if self.block.pinIndex != None:
+            self.block.pinIndex.move(self)
+
+    def updateConnections(self):
+        """ Move the lines of the connections of the pin to its current position.
+        """
+        lines = {}
+        self.collectConnections(lines)
+        QView.paintConnections(lines)
+
+    def collectConnections(self,lines):
+        """ Add the lines of the connections of the pin to lines {line: (input pin, output pin)}
+        """
+        connections = self.getAbstractBlock().system.connections
+        for port in self.ports():
+            if port.mode == data.constants.IN:
+                if port.connection != None:
+                    connLine = connections.get(port.connection)
+                    # Lines of loaded connections are drawn after all the pins
+                    if connLine != None:
+                        lines[connLine] = (self,QPin.endOf(port.connection.out_block,OUT,port.connection.ind_output))
+            else:
+                for i in port.connection:
+                    connLine = connections.get(i)
+                    if connLine != None:
+                        lines[connLine] = (QPin.endOf(i.in_block,IN,i.ind_input),self)
 
     def paint(self,painter,styleOptionGraphicsItem,widget):
-        super().paint(painter,styleOptionGraphicsItem,widget)
\ No newline at end of file
+        if styleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) < QPin.LOD_VISIBLE:
+            return
+        super().paint(painter,styleOptionGraphicsItem,widget)
+
+class QBusPin(QPin):
+    def __init__(self, x, y, slot, first, count, mode, dy, parent):
+        """ Pin that draws a range of ports of a wide block (see QBlock.COLLAPSE_PORTS)
+            Double click on it expands the block.
+
+        :int slot:      Position of the pin on its side of the block
+        :int first:     Index of the first port of the range
+        :int count:     Amount of ports of the range
+        """
+        self.first = first
+        self.count = count
+        super().__init__(x, y, slot, mode, dy, parent)
+        self.setPen(QPen(Qt.black, 3))
+        self.setToolTip("%d ports (double click to expand)"%count)
+
+    @property
+    def index(self):
+        """ Port used when a connection is made with this pin: the first port of the
+            range that is not connected (the first one if all of them are connected).
+            Expand the block to choose other ports.
+        """
+        for ind,port in enumerate(self.ports(),self.first):
+            if not port.connection:
+                return ind
+        return self.first
+
+    @index.setter
+    def index(self, value):
+        pass    # The slot of the pin is given by QPin
+
+    def ports(self):
+        block = self.getAbstractBlock()
+        ports = block.input_ports if self.mode == IN else block.output_ports
+        return ports[self.first:self.first + self.count]
+
+    def mouseDoubleClickEvent(self, event):
+        super().mouseDoubleClickEvent(event)
+        self.block.setExpanded(True)
\ No newline at end of file
@@ -0,0 +1,201 @@
+#-------------------------------------------------------------------------------
+#   PROJECT:   VHDL Code Generator
+#   NAME:      Scene Virtualizer
+#
+#   LICENSE:   GNU-GPL V3
+#-------------------------------------------------------------------------------
+
+__author__ = "BlakeTeam"
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+
+import visual.BlockVisual
+import visual.ViewVisual
+
+class BlockGrid:
+    CELL = 256  # Size of the cells of the grid (scene units)
+
+    def __init__(self):
+        """ Spatial hash of the abstract blocks of a system, by the area they use on the scene.
+            A block is on every cell its area touches.
+        """
+        self.cells = {}     # {(int,int) cell: set Block}
+        self.cellsOf = {}   # {Block block: [(int,int) cell]}
+
+    def cellRange(self, rect):
+        x0,y0 = int(rect.left()//BlockGrid.CELL),int(rect.top()//BlockGrid.CELL)
+        x1,y1 = int(rect.right()//BlockGrid.CELL),int(rect.bottom()//BlockGrid.CELL)
+        return [(i,j) for i in range(x0,x1 + 1) for j in range(y0,y1 + 1)]
+
+    def move(self, block):
+        """ Add a block or update its position.
+        """
+        self.remove(block)
+        cells = self.cellRange(visual.BlockVisual.QBlock.blockRect(block))
+        for cell in cells:
+            self.cells.setdefault(cell,set()).add(block)
+        self.cellsOf[block] = cells
+
+    def remove(self, block):
+        for cell in self.cellsOf.pop(block,()):
+            self.cells[cell].discard(block)
+            if len(self.cells[cell]) == 0:
+                del self.cells[cell]
+
+    def query(self, rect):
+        """ Blocks whose area intersects rect.
+        """
+        found = set()
+        for cell in self.cellRange(rect):
+            for block in self.cells.get(cell,()):
+                if not block in found and visual.BlockVisual.QBlock.blockRect(block).intersects(rect):
+                    found.add(block)
+        return found
+
+class BlockOverview(QGraphicsItem):
+    def __init__(self, grid):
+        """ Blocks drawn as plain rectangles when the view is too far to create their items.
+        """
+        super().__init__()
+        self.grid = grid
+        self.visible = False    # True when the view is too far
+        self.rect = QRectF()
+        self.setZValue(-1)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)  # exposedRect is the area to paint
+
+    def show(self, visible, rect):
+        self.prepareGeometryChange()
+        self.visible = visible
+        self.rect = rect
+        self.update()
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, styleOptionGraphicsItem, widget):
+        if not self.visible:
+            return
+        color = QColor(*visual.BlockVisual.QBlock.COLOR)
+        for block in self.grid.query(styleOptionGraphicsItem.exposedRect):
+            painter.fillRect(visual.BlockVisual.QBlock.blockRect(block),color)
+
+class SceneVirtualizer(QObject):
+    MARGIN = 0.5        # Margin around the viewport (fraction of its size) where items are created too
+    MIN_SCALE = 0.25    # Below this zoom no items are created, blocks are drawn by BlockOverview
+    DELAY = 30          # Milliseconds between the scroll & the update of the items
+
+    def __init__(self, view, system):
+        """ Virtualized scene: the whole system is loaded, but QBlock & QPin items are
+            only created for the blocks near the visible region of the view. Items of
+            blocks that go out of it are removed from the scene.
+            Connection lines exist only while at least one of their blocks has items.
+
+        :QView view:        View of the project.
+        :System system:     System of the project.
+        """
+        super().__init__(view)
+        self.view = view
+        self.system = system
+        self.items = {}     # QBlock of each block with items {Block: QBlock}
+
+        self.grid = BlockGrid()
+        for block in system.block:
+            self.grid.move(block)
+        self.overview = BlockOverview(self.grid)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SceneVirtualizer.DELAY)
+        self.timer.timeout.connect(self.refresh)
+
+    def schedule(self):
+        """ Update the items after the view changed (it is done once for many changes)
+        """
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def visibleRect(self):
+        rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        dx = rect.width()*SceneVirtualizer.MARGIN
+        dy = rect.height()*SceneVirtualizer.MARGIN
+        return rect.adjusted(-dx,-dy,dx,dy)
+
+    def refresh(self):
+        """ Create the items of the blocks near the viewport & remove the rest.
+        """
+        rect = self.visibleRect()
+        far = self.view.transform().m11() < SceneVirtualizer.MIN_SCALE
+        self.overview.show(far,rect)
+
+        wanted = set() if far else self.grid.query(rect)
+        grabbed = self.view.scene().mouseGrabberItem()
+        for block in [i for i in self.items if not i in wanted]:
+            if not self.items[block] is grabbed:    # It is being dragged
+                self.release(block)
+        for block in wanted:
+            if not block in self.items:
+                self.materialize(block)
+
+    def addBlock(self, block, item):
+        """ A block (with its QBlock already created) was added to the system.
+        """
+        self.grid.move(block)
+        self.items[block] = item
+
+    def blockMoved(self, block):
+        self.grid.move(block)
+
+    def reset(self):
+        """ Blocks were moved without their items (see IProject.autoLayout)
+        """
+        for block in self.system.block:
+            self.grid.move(block)
+        for block,item in self.items.items():
+            item.setPos(*block.screenPos)
+        self.refresh()
+
+    def connectionsOf(self, block):
+        for port in block.input_ports:
+            if port.connection != None:
+                yield port.connection
+        for port in block.output_ports:
+            for conn in port.connection:
+                yield conn
+
+    def hasItems(self, block):
+        return block in self.items or not block in self.grid.cellsOf   # System input & output always have items
+
+    def materialize(self, block):
+        scene = self.view.scene()
+        item = visual.BlockVisual.QBlock(block, self.view)
+        scene.addItem(item)
+        self.items[block] = item
+
+        connections = self.system.connections
+        for conn in self.connectionsOf(block):
+            if connections.get(conn) == None:
+                line = visual.ViewVisual.ConnectionLine()
+                scene.addItem(line)
+                connections[conn] = line
+        item.updatePorts()
+
+    def release(self, block):
+        scene = self.view.scene()
+        item = self.items.pop(block)
+        self.view.connectionRedraw.moved.discard(item)
+
+        for pin in item.inputPort + item.outputPort:
+            self.view.pinIndex.remove(pin)
+            scene.removeItem(pin)
+        for port in block.input_ports + block.output_ports:
+            port.pin = None
+        scene.removeItem(item)
+
+        connections = self.system.connections
+        for conn in self.connectionsOf(block):
+            other = conn.in_block if conn.out_block is block else conn.out_block
+            line = connections.get(conn)
+            if line != None and not self.hasItems(other):
+                scene.removeItem(line)
+                connections[conn] = None
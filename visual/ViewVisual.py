@@ -9,6 +9,8 @@ import visual.BlockVisual
 import data.constants
 
 class QView(QGraphicsView):
+    SNAP_DISTANCE = 8   # Pixels (on the screen) to snap to a pin
+
     def __init__(self,project, parent = None):
         super().__init__(parent)
         # self.setDragMode(QGraphicsView.ScrollHandDrag)
@@ -21,6 +23,18 @@ class QView(QGraphicsView):
 
         self.project = project      # Project where is the view.
 
+        self.connectionRedraw = ConnectionRedraw(self)  # Moves the connections of dragged blocks
+        self.pinIndex = PinIndex()                      # Pins of the scene by position
+        self.virtualizer = None                         # Creates the items of the visible blocks (see SceneVirtualizer)
+        self.connectionBundle = ConnectionBundle(project.system) # Connections drawn when zoomed out
+
+    def pinAt(self, pos):
+        """ Pin nearest to a position of the view, None if there is no pin close enough.
+        """
+        point = self.mapToScene(pos)
+        tolerance = QView.SNAP_DISTANCE/self.transform().m11()
+        return self.pinIndex.nearest(point.x(),point.y(),tolerance)
+
     def mode(self):
         # Return the mode
         return self.project.mainWindow.state
@@ -32,33 +46,34 @@ class QView(QGraphicsView):
         self.currentLine = QGraphicsLineItem(x, y, x+1, y+1)
         self.scene().addItem(self.currentLine)
 
-    def endLine(self,item):
-        if isinstance(item,visual.BlockVisual.QPin):
-            print("YEES")
-
+    def endLine(self):
         self.scene().removeItem(self.currentLine)
         self.drawConn = False
         self.currentLine = None
 
     def mouseMoveEvent(self, event):
         super().mouseMoveEvent(event)
-        item = self.scene().itemAt(self.mapToScene(event.pos()))
+        item = self.pinAt(event.pos())
 
-        if isinstance(item,visual.BlockVisual.QPin) and self.mode() == data.constants.DEFAULT_MODE:
+        if item != None and self.mode() == data.constants.DEFAULT_MODE:
             self.setCursor(Qt.CrossCursor)
         else:
             self.setCursor(Qt.ArrowCursor)
 
         if self.drawConn:
-            coord = self.mapToScene(event.pos().x(), event.pos().y())
-            x2 = coord.x()
-            y2 = coord.y()
+            if item != None and item is not self.currentItem:
+                # Snapping to the nearest pin
+                x2,y2 = item.x1,item.y1
+            else:
+                coord = self.mapToScene(event.pos().x(), event.pos().y())
+                x2 = coord.x()
+                y2 = coord.y()
             self.currentLine.setLine(self.currentItem.x1, self.currentItem.y1, x2, y2)
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
-        item = self.itemAt(event.pos())
-        if isinstance(item,visual.BlockVisual.QPin) and self.mode() == data.constants.DEFAULT_MODE:
+        item = self.pinAt(event.pos())
+        if item != None and self.mode() == data.constants.DEFAULT_MODE:
             self.currentItem = item
             self.beginLine()
             # self.setDragMode(self.NoDrag)
@@ -66,15 +81,13 @@ class QView(QGraphicsView):
     def mouseReleaseEvent(self, event):
         super().mouseReleaseEvent(event)
         if self.drawConn:
-            coord = self.mapToScene(event.pos().x(), event.pos().y())
-
-            self.endLine(self.itemAt(coord.toPoint()))
+            self.endLine()
             # self.setDragMode(self.ScrollHandDrag)
 
-            item = self.itemAt(event.pos())
+            item = self.pinAt(event.pos())
             # print("Item size:%d\nItem2 Size:%d"%(item.getSize(),self.currentItem.getSize()))
 
-            if isinstance(item, visual.BlockVisual.QPin) and item.mode != self.currentItem.mode and item.getSize() == self.currentItem.getSize():
+            if item != None and item.mode != self.currentItem.mode and item.getSize() == self.currentItem.getSize():
                 # inputItem & outputItem are QPin
                 if item.mode == data.constants.IN:
                     inputItem = item
@@ -94,16 +107,29 @@ class QView(QGraphicsView):
                     print("ESTABLISHING CONNECTION BETWEEN %s & %s"%(str(inputItem),str(outputItem)))
 
                     # VISUAL CONNECTION
-                    visualConnection = QGraphicsLineItem()
+                    visualConnection = ConnectionLine()
                     visualConnection = QView.paintConnection(inputItem,outputItem,visualConnection)
                     self.scene().addItem(visualConnection)
 
                     # ABSTRACT CONNECTION
                     system = self.project.system
                     system.connect(outputItem.getAbstractBlock(),outputItem.index,inputItem.getAbstractBlock(),inputItem.index,visualConnection)
+                    self.connectionBundle.invalidate()
 
             self.currentItem = None
 
+    @staticmethod
+    def paintConnections(lines):
+        """ Paint the lines {line: (input pin, output pin)}.
+            Lines with the same ends (connections between bus pins) are drawn once.
+        """
+        drawn = set()
+        for line,(inputPin,outputPin) in lines.items():
+            QView.paintConnection(inputPin,outputPin,line)
+            ends = (inputPin.x1,inputPin.y1,outputPin.x1,outputPin.y1)
+            line.setVisible(not ends in drawn)
+            drawn.add(ends)
+
     @staticmethod
     def paintConnection(item1,item2,line):
         x1,y1 = item1.x1,item1.y1
@@ -116,4 +142,236 @@ class QView(QGraphicsView):
         if event.delta() > 0:
             self.scale(1.25,1.25)
         else:
-            self.scale(0.8,0.8)
\ No newline at end of file
+            self.scale(0.8,0.8)
+        self.connectionBundle.setShown(self.transform().m11() < ConnectionLine.LOD_BUNDLED)
+        if self.virtualizer != None:
+            self.virtualizer.schedule()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        if self.virtualizer != None:
+            self.virtualizer.schedule()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.virtualizer != None:
+            self.virtualizer.schedule()
+
+class ConnectionRedraw(QObject):
+    FRAME = 16  # Milliseconds between redraws (~60 frames per second)
+
+    def __init__(self, parent = None):
+        """ Redraw the pins & connections of the blocks that are moved, at most once per frame.
+            Blocks moved between two frames (a drag, or a drag of several selected
+            blocks) are collected, and each affected connection line is painted once.
+        """
+        super().__init__(parent)
+        self.moved = set()  # QBlock moved since the last frame
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(ConnectionRedraw.FRAME)
+        self.timer.timeout.connect(self.redraw)
+
+    def blockMoved(self, block):
+        self.moved.add(block)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def redraw(self):
+        moved, self.moved = self.moved, set()
+
+        lines = {}  # {QGraphicsLineItem line: (QPin input, QPin output)}
+        for block in moved:
+            block.commitPosition()
+            for pin in block.inputPort + block.outputPort:
+                pin.updateGeometry()
+            for pin in block.inputPort + block.outputPort:
+                pin.collectConnections(lines)
+
+        QView.paintConnections(lines)
+        self.parent().connectionBundle.blocksMoved([block.block for block in moved])
+
+class PinIndex:
+    CELL = 32   # Size of the cells of the grid (scene units)
+
+    def __init__(self):
+        """ Spatial hash of the pins of a scene, by the position of their outer end (x1,y1).
+            Pins are kept on a grid of square cells, so finding the pins near a
+            point only checks a few cells, no matter how many pins the scene has.
+        """
+        self.cells = {}     # {(int,int) cell: set QPin}
+        self.cellOf = {}    # {QPin pin: (int,int) cell}
+
+    def cell(self, x, y):
+        return int(x//PinIndex.CELL),int(y//PinIndex.CELL)
+
+    def move(self, pin):
+        """ Add a pin or update its position. It is called when the geometry of the pin changes.
+        """
+        cell = self.cell(pin.x1,pin.y1)
+        old = self.cellOf.get(pin)
+        if old == cell:
+            return
+        if old != None:
+            self.cells[old].discard(pin)
+            if len(self.cells[old]) == 0:
+                del self.cells[old]
+        self.cells.setdefault(cell,set()).add(pin)
+        self.cellOf[pin] = cell
+
+    def remove(self, pin):
+        cell = self.cellOf.pop(pin,None)
+        if cell != None:
+            self.cells[cell].discard(pin)
+            if len(self.cells[cell]) == 0:
+                del self.cells[cell]
+
+    def nearest(self, x, y, tolerance):
+        """ Pin nearest to (x,y), None if there is no pin within tolerance.
+        """
+        x0,y0 = self.cell(x - tolerance,y - tolerance)
+        x1,y1 = self.cell(x + tolerance,y + tolerance)
+
+        best = None
+        bestDistance = tolerance*tolerance
+        for i in range(x0,x1 + 1):
+            for j in range(y0,y1 + 1):
+                for pin in self.cells.get((i,j),()):
+                    distance = (pin.x1 - x)**2 + (pin.y1 - y)**2
+                    if distance <= bestDistance:
+                        best = pin
+                        bestDistance = distance
+        return best
+
+class ConnectionLine(QGraphicsLineItem):
+    LOD_BUNDLED = 0.3   # Below this level of detail connections are drawn by ConnectionBundle
+
+    def paint(self, painter, styleOptionGraphicsItem, widget):
+        if styleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) < ConnectionLine.LOD_BUNDLED:
+            return
+        super().paint(painter, styleOptionGraphicsItem, widget)
+
+class ConnectionBundle(QGraphicsItem):
+    MARGIN = 100    # Scene units around the lines, they are drawn with a cosmetic pen of up to 8 pixels
+
+    def __init__(self, system):
+        """ Connections of the system drawn when the view is zoomed out.
+            All the connections between two blocks are drawn as a single line,
+            between the centers of both blocks, as wide as the amount of connections.
+            While the view is zoomed in nothing is recomputed, changes are only
+            collected (see setShown)
+        """
+        super().__init__()
+        self.system = system
+        self.bundles = None     # {(Block output, Block input): [QPointF start, QPointF end, int connections]}, None if it must be rebuilt
+        self.byBlock = {}       # Bundles of each block {Block: [(Block output, Block input)]}
+        self.moved = set()      # Blocks moved since the bundles were updated
+        self.shown = False      # True when the view is zoomed out enough to draw the bundles
+        self.rect = QRectF()
+        self.setZValue(-1)      # Below blocks & pins
+
+    def setShown(self, shown):
+        """ The zoom of the view changed. Bundles are updated when they start being drawn,
+            while they are hidden the item has no area.
+        """
+        if shown != self.shown:
+            self.prepareGeometryChange()
+            self.shown = shown
+            if shown:
+                self.refresh()
+
+    def invalidate(self):
+        """ The connections changed, the bundles must be rebuilt.
+        """
+        if self.shown:
+            self.prepareGeometryChange()
+        self.bundles = None
+        self.moved = set()
+        if self.shown:
+            self.refresh()
+
+    def blocksMoved(self, blocks):
+        """ Only the bundles of the moved blocks are updated.
+
+        :Block[] blocks:    Abstract blocks that were moved.
+        """
+        if self.bundles == None:
+            return  # Everything is rebuilt
+        self.moved.update(blocks)
+        if self.shown:
+            self.refresh()
+
+    def refresh(self):
+        if self.bundles == None:
+            self.rebuild()
+        else:
+            for block in self.moved:
+                for key in self.byBlock.get(block,()):
+                    bundle = self.bundles[key]
+                    bundle[0] = ConnectionBundle.center(key[0])
+                    bundle[1] = ConnectionBundle.center(key[1])
+        self.moved = set()
+
+        # The area is computed again, it shrinks when blocks are moved closer
+        rect = self.bundleRect()
+        if rect != self.rect:
+            self.prepareGeometryChange()
+            self.rect = rect
+        self.update()
+
+    def bundleRect(self):
+        """ Area of the lines of the bundles (without margin)
+        """
+        if len(self.bundles) == 0:
+            return QRectF()
+        xs = [point.x() for start,end,total in self.bundles.values() for point in (start,end)]
+        ys = [point.y() for start,end,total in self.bundles.values() for point in (start,end)]
+        return QRectF(QPointF(min(xs),min(ys)),QPointF(max(xs),max(ys)))
+
+    @staticmethod
+    def center(block):
+        """ Center of an abstract block on the scene, it may not have a QBlock (see SceneVirtualizer)
+        """
+        for ports in (block.input_ports,block.output_ports):
+            if len(ports) != 0 and ports[0].pin != None:
+                return ports[0].pin.block.sceneBoundingRect().center()
+        return visual.BlockVisual.QBlock.blockRect(block).center()
+
+    def rebuild(self):
+        self.bundles = {}
+        self.byBlock = {}
+        for conn in self.system.connections:
+            key = (conn.out_block,conn.in_block)
+            bundle = self.bundles.get(key)
+            if bundle == None:
+                self.bundles[key] = [None,None,1]
+                self.byBlock.setdefault(key[0],[]).append(key)
+                if key[1] is not key[0]:
+                    self.byBlock.setdefault(key[1],[]).append(key)
+            else:
+                bundle[2] += 1
+
+        for (outputBlock,inputBlock),bundle in self.bundles.items():
+            bundle[0] = ConnectionBundle.center(outputBlock)
+            bundle[1] = ConnectionBundle.center(inputBlock)
+
+    def boundingRect(self):
+        # Nothing is computed while the bundles are hidden (see setShown)
+        if not self.shown:
+            return QRectF()
+        margin = ConnectionBundle.MARGIN
+        return self.rect.adjusted(-margin,-margin,margin,margin)
+
+    def paint(self, painter, styleOptionGraphicsItem, widget):
+        if not self.shown or self.bundles == None:
+            return
+        if styleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) >= ConnectionLine.LOD_BUNDLED:
+            return
+
+        pen = QPen()
+        pen.setCosmetic(True)
+        for start,end,total in self.bundles.values():
+            pen.setWidth(min(total,8))
+            painter.setPen(pen)
+            painter.drawLine(start,end)